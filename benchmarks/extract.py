@@ -0,0 +1,54 @@
+"""Compare the kanji extractors of kanjigrid.counter
+
+python benchmarks/extract.py [corpus.txt] [repeat]
+"""
+import sys
+import time
+from collections import Counter
+
+from kanjigrid.counter import EXTRACTORS, KANJI_SET, KanjiCounter, get_numpy
+
+
+def best_of(func, rounds=5):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "test.txt"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read() * repeat
+    mb = len(text.encode("utf-8")) / 1e6
+    reference = Counter("".join(filter(KANJI_SET.__contains__, text)))
+
+    candidates = {
+        "_clean_text": lambda c: c.update(
+            "".join(filter(KANJI_SET.__contains__, text))
+        ),
+    }
+    for name, extractor in EXTRACTORS.items():
+        if name == "numpy" and get_numpy() is None:
+            continue
+        candidates[name] = lambda c, extractor=extractor: extractor(text, c, KANJI_SET)
+
+    print(f"{path} x{repeat}: {mb:.1f} MB")
+    for name, count in candidates.items():
+        for counter_cls in (Counter, KanjiCounter):
+            counter = counter_cls()
+            count(counter)
+            assert counter == reference, name
+            elapsed = best_of(lambda: count(counter_cls()))
+            print(
+                f"{name:>22} -> {counter_cls.__name__:<12} "
+                f"{elapsed * 1000:8.1f} ms {mb / elapsed:8.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
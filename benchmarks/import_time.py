@@ -0,0 +1,68 @@
+"""Check import kanjigrid and grading construction against a time budget
+
+python benchmarks/import_time.py
+exits with 1 if a budget is exceeded
+"""
+import subprocess
+import sys
+
+# best of ROUNDS runs, importing Pillow alone takes about 30 ms of the import budget
+IMPORT_BUDGET_MS = 100
+FIRST_GRADING_BUDGET_MS = 20
+GRADING_BUDGET_US = 100
+ROUNDS = 5
+
+
+def import_time_ms():
+    # -X importtime reports the cumulative microseconds of every imported module
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import kanjigrid"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        if line.rstrip().endswith("| kanjigrid"):
+            return int(line.split("|")[1]) / 1000
+    raise RuntimeError("kanjigrid missing from -X importtime output")
+
+
+def construction_times():
+    code = """
+import time, kanjigrid
+start = time.perf_counter()
+kanjigrid.Jouyou(), kanjigrid.JLPT(), kanjigrid.Kanken()
+first = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(1000):
+    for grading in (kanjigrid.Jouyou(), kanjigrid.JLPT(), kanjigrid.Kanken()):
+        grading.get_all_in_grading()
+print(first * 1000, (time.perf_counter() - start) / 3000 * 1e6)
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    first_ms, per_instance_us = map(float, result.stdout.split())
+    return first_ms, per_instance_us
+
+
+def main():
+    imports = min(import_time_ms() for _ in range(ROUNDS))
+    constructions = [construction_times() for _ in range(ROUNDS)]
+    first = min(c[0] for c in constructions)
+    per_instance = min(c[1] for c in constructions)
+    checks = [
+        ("import kanjigrid", imports, IMPORT_BUDGET_MS, "ms"),
+        ("first Jouyou+JLPT+Kanken", first, FIRST_GRADING_BUDGET_MS, "ms"),
+        ("grading with index", per_instance, GRADING_BUDGET_US, "us"),
+    ]
+    failed = False
+    for name, value, budget, unit in checks:
+        ok = value <= budget
+        failed |= not ok
+        print(f"{name:>26}: {value:8.2f} {unit} (budget {budget} {unit}) {'ok' if ok else 'OVER'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
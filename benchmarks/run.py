@@ -0,0 +1,241 @@
+"""Benchmark suite for ingestion, layout and rendering
+
+python benchmarks/run.py --out results.json
+python benchmarks/run.py --out new.json --compare results.json
+
+Corpora are generated locally from a fixed seed, so runs on different
+releases measure the same input. Every make_grid case runs in its own
+process so its peak memory can be read from the OS.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import time
+
+import kanjigrid
+from kanjigrid.counter import get_numpy
+
+GRADINGS = {
+    "Jouyou": lambda: kanjigrid.Jouyou(),
+    "JLPT": lambda: kanjigrid.JLPT(),
+    "Kanken": lambda: kanjigrid.Kanken(),
+    "Kanken+level1": lambda: kanjigrid.Kanken(use_level1=True),
+}
+# (kanjifontsize, columns)
+GRID_SETTINGS = [(40, 50), (24, 80), (64, 30)]
+FILLER = "のはにをがでとたてしいるするですますこれそれあのーっ、。「」！？ 　\n"
+
+
+def synthetic_corpus(size_mb, seed=0):
+    """text of about size_mb MB of UTF-8, roughly a third of it kanji
+
+    kanji follow a Zipf-like distribution over the Kanken kanji so the
+    common ones repeat and the rare ones show up in the additions
+    """
+    rng = random.Random(seed)
+    kanji = sorted(kanjigrid.Kanken(use_level1=True).get_all_in_grading())
+    rng.shuffle(kanji)
+    weights = [1 / (rank + 1) for rank in range(len(kanji))]
+    # characters are 3 bytes in UTF-8, apart from the newline and space
+    chars = int(size_mb * 1e6 / 3)
+    block = 1 << 16
+    parts = []
+    for start in range(0, chars, block):
+        n = min(block, chars - start)
+        n_kanji = n // 3
+        text = rng.choices(kanji, weights, k=n_kanji)
+        text += rng.choices(FILLER, k=n - n_kanji)
+        rng.shuffle(text)
+        parts.append("".join(text))
+    return "".join(parts)
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def _throughput(name, mb, seconds):
+    return {
+        "bench": name,
+        "corpus_mb": round(mb, 2),
+        "seconds": seconds,
+        "mb_per_s": mb / seconds,
+    }
+
+
+def bench_ingestion(args, corpus_sizes):
+    results = []
+    for size_mb in corpus_sizes:
+        text = synthetic_corpus(size_mb)
+        mb = len(text.encode("utf-8")) / 1e6
+        gridder = kanjigrid.Gridder(
+            args.kanji_font, 40, args.header_font, 52, extractor=args.extractor
+        )
+        seconds = best_of(lambda: gridder._clean_text(text), args.repeat)
+        results.append(_throughput("_clean_text", mb, seconds))
+        for compact in (False, True):
+            name = "feed_text/KanjiCounter" if compact else "feed_text/Counter"
+
+            def feed():
+                gridder = kanjigrid.Gridder(
+                    args.kanji_font,
+                    40,
+                    args.header_font,
+                    52,
+                    compact_counter=compact,
+                    extractor=args.extractor,
+                )
+                gridder.feed_text(text)
+
+            seconds = best_of(feed, args.repeat)
+            results.append(_throughput(name, mb, seconds))
+        print(f"ingestion {mb:.1f} MB done", file=sys.stderr)
+    return results
+
+
+def _render_case(args, grading_name, fontsize, columns, mode, queue):
+    # runs in a child process, so ru_maxrss only covers this case
+    gridder = kanjigrid.Gridder(
+        args.kanji_font, fontsize, args.header_font, 52, columns=columns, mode=mode
+    )
+    gridder.feed_text(synthetic_corpus(args.render_corpus_mb))
+    grading = GRADINGS[grading_name]()
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    layout = gridder.dry_grid(grading, True, True, True)
+    layout_seconds = time.perf_counter() - start
+    # the first render fills the glyph atlas, the later ones show the steady state
+    start = time.perf_counter()
+    grid = gridder.make_grid(grading, True, True, True)
+    first_seconds = time.perf_counter() - start
+    seconds = best_of(lambda: gridder.make_grid(grading, True, True, True), args.repeat)
+    rss_after = peak_rss_mb()
+    buffer = io.BytesIO()
+    start = time.perf_counter()
+    kanjigrid.save_grid(grid, buffer)
+    encode_seconds = time.perf_counter() - start
+    queue.put(
+        {
+            "bench": f"make_grid/{grading_name}/{fontsize}px/{columns}col/{mode}",
+            "size": list(layout.size),
+            "layout_seconds": layout_seconds,
+            "first_seconds": first_seconds,
+            "seconds": seconds,
+            "peak_rss_mb": rss_after,
+            "render_rss_mb": None if rss_after is None else rss_after - rss_before,
+            "png_encode_seconds": encode_seconds,
+            "png_bytes": len(buffer.getvalue()),
+        }
+    )
+
+
+def bench_rendering(args):
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for grading_name in args.gradings:
+        for fontsize, columns in GRID_SETTINGS:
+            for mode in args.modes:
+                queue = context.Queue()
+                process = context.Process(
+                    target=_render_case,
+                    args=(args, grading_name, fontsize, columns, mode, queue),
+                )
+                process.start()
+                result = queue.get()
+                process.join()
+                results.append(result)
+                print(f"{result['bench']} done", file=sys.stderr)
+    return results
+
+
+def _key(result):
+    if "corpus_mb" in result:
+        return f"{result['bench']} ({result['corpus_mb']} MB)"
+    return result["bench"]
+
+
+def compare(results, baseline, threshold):
+    """print the change of every case against baseline, return the regressed ones"""
+    old = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        key = _key(result)
+        if key not in old:
+            continue
+        ratio = result["seconds"] / old[key]["seconds"]
+        flag = ""
+        if ratio > threshold:
+            flag = " REGRESSION"
+            regressions.append(key)
+        print(f"{key:>50}: {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kanji-font", default="Kanji")
+    parser.add_argument("--header-font", default="Header")
+    parser.add_argument("--corpus-mb", type=float, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--render-corpus-mb", type=float, default=1)
+    parser.add_argument(
+        "--gradings", nargs="+", default=list(GRADINGS), choices=list(GRADINGS)
+    )
+    parser.add_argument(
+        "--modes", nargs="+", default=["RGB", "P"], choices=["RGB", "P"]
+    )
+    parser.add_argument("--extractor", default="auto")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_output.json")
+    parser.add_argument("--compare", help="earlier results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="slowdown that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    results = bench_ingestion(args, args.corpus_mb) + bench_rendering(args)
+    output = {
+        "meta": {
+            "kanjigrid": kanjigrid.__version__,
+            "python": platform.python_version(),
+            "pillow": kanjigrid.kanjigrid.Image.__version__,
+            "numpy": getattr(get_numpy(), "__version__", None),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,16 @@
-from .kanjigrid import Gridder
+from .kanjigrid import Gridder, save_grid
 from .gradings import *
-from importlib.metadata import version
+from .atlas import GlyphAtlas
+from .cache import GridCache
+from .instrument import StageStats
+from .sinks import APNGWriter, GIFWriter, PNGBandWriter, TilePyramidWriter
 
-__version__ = version(__package__)
+
+def __getattr__(name):
+    # looking up the installed version is slow, so it only happens when asked for
+    if name == "__version__":
+        from importlib.metadata import version
+
+        globals()["__version__"] = version(__package__)
+        return globals()["__version__"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
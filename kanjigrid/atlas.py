@@ -0,0 +1,57 @@
+from PIL import Image, ImageDraw
+from collections import OrderedDict
+from threading import Lock
+
+# FreeType faces mustn't be used from several threads at once, and loaded fonts
+# are shared by every Gridder (see fonts.load_font), so all text is drawn
+# under this one lock
+render_lock = Lock()
+
+
+class GlyphAtlas:
+    """LRU cache of rasterized glyph masks, can be shared between Gridders"""
+
+    def __init__(self, maxsize=8192):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._masks = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._masks)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._masks.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_mask(self, text, font, cellsize, offset):
+        """return the "L" alpha mask of text drawn at (0, offset) in a cellsize square"""
+        key = (getattr(font, "path", id(font)), font.size, offset, cellsize, text)
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                self.hits += 1
+                return mask
+            self.misses += 1
+        mask = Image.new("L", (cellsize, cellsize), 0)
+        with render_lock:
+            ImageDraw.Draw(mask).text((0, offset), text, font=font, fill=255)
+        with self._lock:
+            # another thread may have drawn the same glyph meanwhile
+            mask = self._masks.setdefault(key, mask)
+            while len(self._masks) > self.maxsize:
+                self._masks.popitem(last=False)
+        return mask
+
+
+# used by every Gridder that isn't given its own atlas
+default_atlas = GlyphAtlas()
@@ -0,0 +1,190 @@
+from io import BytesIO
+from threading import Lock
+import hashlib
+import os
+import re
+import tempfile
+from .kanjigrid import save_grid
+
+# bump when the rendering changes, so old entries are no longer found
+CACHE_VERSION = 2
+
+# names of cached grids, other files in the directory are left alone
+_ENTRY_NAME = re.compile(r"[0-9a-f]{64}\.(png|webp)")
+
+# the Gridder settings that change how a grid looks
+_SETTINGS = (
+    "columns",
+    "colordict",
+    "bar_padding",
+    "padding_above_header",
+    "padding_under_header",
+    "grid_side_padding",
+    "bar_hori_border",
+    "bar_vert_border",
+    "kanji_font_color",
+    "header_font_color",
+    "background_color",
+    "kanji_background_color",
+    "mode",
+    "palette_shades",
+)
+
+
+def _hash_counts(digest, kcounter):
+    # the same counts hash the same in a Counter and a KanjiCounter
+    for kanji, count in sorted(kcounter.items()):
+        if count > 0:
+            digest.update(f"{kanji}{count},".encode("utf-8"))
+
+
+def _hash_grading(digest, grading):
+    # the kanji sets cover use_correct_kanji, use_level1 and changes by hand
+    digest.update(f"{type(grading).__module__}.{type(grading).__qualname__}".encode())
+    for flag in ("use_correct_kanji", "use_level1"):
+        digest.update(f"{flag}={getattr(grading, flag, None)}".encode())
+    for key, val in grading.gradings.items():
+        digest.update(f"{key!r}:{val['Name']}:".encode("utf-8"))
+        digest.update("".join(sorted(val["Kanji"])).encode("utf-8"))
+
+
+def _hash_settings(digest, gridder):
+    for font in (gridder.kfont, gridder.hfont):
+        path = getattr(font, "path", None)
+        digest.update(f"{path!r}:{font.size}:{font.getname()}".encode("utf-8"))
+    for name in _SETTINGS:
+        value = getattr(gridder, name)
+        if isinstance(value, dict):
+            value = sorted(value.items())
+        digest.update(f"{name}={value!r}".encode("utf-8"))
+
+
+class GridCache:
+    """Disk cache of encoded grids, keyed by the counts, grading, settings and options
+
+    the least recently used grids are deleted once they grow past max_bytes,
+    other files in the directory are never touched. Several processes may
+    share a directory, though the size is only counted by this one.
+    """
+
+    def __init__(self, directory, max_bytes=256 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _entries(self):
+        # (mtime, size, path) of every cached grid
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if _ENTRY_NAME.fullmatch(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def key(self, gridder, grading, options):
+        """hex digest for the grid gridder would render for grading with options
+
+        options is a dict of everything else that changes the output, like the
+        make_grid flags and the encoder settings
+        """
+        digest = hashlib.sha256(f"kanjigrid cache {CACHE_VERSION}".encode())
+        with gridder._count_lock:
+            _hash_counts(digest, gridder.kcounter)
+        _hash_grading(digest, grading)
+        _hash_settings(digest, gridder)
+        digest.update(repr(sorted(options.items())).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_grid(
+        self,
+        gridder,
+        grading,
+        outside_of_grading=False,
+        stats=False,
+        bar_graph=False,
+        format="PNG",
+        **params,
+    ):
+        """return the grid encoded as bytes, from the cache or from make_grid
+
+        params are passed to save_grid
+        """
+        format = format.upper()
+        options = dict(
+            params,
+            outside_of_grading=outside_of_grading,
+            stats=stats,
+            bar_graph=bar_graph,
+            format=format,
+        )
+        # the counts mustn't change between hashing and rendering
+        with gridder._count_lock:
+            path = os.path.join(
+                self.directory,
+                f"{self.key(gridder, grading, options)}.{format.lower()}",
+            )
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                # the mtime is what eviction goes by
+                os.utime(path)
+            except FileNotFoundError:
+                data = None
+            if data is not None:
+                with self._lock:
+                    self.hits += 1
+                return data
+            grid = gridder.make_grid(grading, outside_of_grading, stats, bar_graph)
+        buffer = BytesIO()
+        save_grid(grid, buffer, format, **params)
+        data = buffer.getvalue()
+        self._store(path, data)
+        with self._lock:
+            self.misses += 1
+        return data
+
+    def _store(self, path, data):
+        # written to a temporary file first so readers never see half a grid
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        with self._lock:
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # deletes the oldest entries until the cache is down to max_bytes
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                os.unlink(path)
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
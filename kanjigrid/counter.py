@@ -0,0 +1,356 @@
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from functools import lru_cache
+
+_np = False
+
+
+def get_numpy():
+    """return numpy or None if it isn't installed, imported on first use"""
+    global _np
+    if _np is False:
+        try:
+            import numpy as _np
+        except ImportError:
+            _np = None
+    return _np
+
+# the kanji a Gridder counts: 一..龯 followed by two extra slots for 々 and 〆
+FIRST_KANJI = ord("一")
+LAST_KANJI = ord("龯")
+EXTRA_KANJI = "々〆"
+KANJI_SLOTS = LAST_KANJI - FIRST_KANJI + 1 + len(EXTRA_KANJI)
+# i might want to use a more restricted set as this also contains hanzi and radicals
+KANJI_SET = frozenset(map(chr, range(FIRST_KANJI, LAST_KANJI + 1))) | frozenset(
+    EXTRA_KANJI
+)
+
+
+def kanji_slot(kanji):
+    """return the array index of kanji, raises ValueError for other characters"""
+    cp = ord(kanji)
+    if FIRST_KANJI <= cp <= LAST_KANJI:
+        return cp - FIRST_KANJI
+    if kanji in EXTRA_KANJI:
+        return LAST_KANJI - FIRST_KANJI + 1 + EXTRA_KANJI.index(kanji)
+    raise ValueError(f"{kanji!r} is not in the kanji range")
+
+
+def slot_kanji(slot):
+    if slot > LAST_KANJI - FIRST_KANJI:
+        return EXTRA_KANJI[slot - (LAST_KANJI - FIRST_KANJI + 1)]
+    return chr(FIRST_KANJI + slot)
+
+
+# characters _slot_counts converts at once, keeps its arrays at about 1 MB
+SLICE_SIZE = 1 << 16
+
+
+def _slot_counts(text):
+    # numpy only: count of every slot in text, other characters are dropped
+    np = get_numpy()
+    counts = np.zeros(KANJI_SLOTS, dtype=np.int64)
+    ranged = counts[: LAST_KANJI - FIRST_KANJI + 1]
+    for start in range(0, len(text), SLICE_SIZE):
+        part = text[start : start + SLICE_SIZE].encode("utf-32-le")
+        cps = np.frombuffer(part, dtype=np.uint32)
+        # only the kanji are widened for bincount
+        cps = cps[(cps >= FIRST_KANJI) & (cps <= LAST_KANJI)] - FIRST_KANJI
+        ranged += np.bincount(cps, minlength=len(ranged))
+    for kanji in EXTRA_KANJI:
+        counts[kanji_slot(kanji)] = text.count(kanji)
+    return counts
+
+
+def _count_filter(text, counter, kanji_set):
+    # one set lookup per character, the original way of doing it
+    counter.update(filter(kanji_set.__contains__, text))
+
+
+@lru_cache(maxsize=None)
+def _non_kanji_re():
+    # matches everything that is not in KANJI_SET, compiling it takes a while
+    return re.compile(f"[^{EXTRA_KANJI}{chr(FIRST_KANJI)}-{chr(LAST_KANJI)}]+")
+
+
+def _count_regex(text, counter, kanji_set):
+    # always counts KANJI_SET, count_kanji refuses other sets
+    counter.update(_non_kanji_re().sub("", text))
+
+
+def _count_numpy(text, counter, kanji_set):
+    # always counts KANJI_SET, count_kanji refuses other sets
+    np = get_numpy()
+    if isinstance(counter, KanjiCounter):
+        counter._counts += _slot_counts(text)
+        return
+    counts = _slot_counts(text)
+    counter.update({slot_kanji(i): int(counts[i]) for i in np.flatnonzero(counts)})
+
+
+EXTRACTORS = {
+    "filter": _count_filter,
+    "regex": _count_regex,
+    "numpy": _count_numpy,
+}
+
+
+def check_extractor(extractor):
+    """raise ValueError if extractor can't be used, see count_kanji"""
+    if extractor != "auto" and extractor not in EXTRACTORS:
+        raise ValueError(
+            f"Unknown extractor {extractor!r},"
+            f" use auto or one of {', '.join(EXTRACTORS)}"
+        )
+    if extractor == "numpy" and get_numpy() is None:
+        raise ValueError("the numpy extractor needs numpy to be installed")
+
+
+def count_kanji(text, counter, extractor="auto", kanji_set=KANJI_SET):
+    """add the kanji of text to counter
+
+    extractor is one of EXTRACTORS or "auto". Only "filter" can count a custom
+    kanji_set, the others raise ValueError for one. "auto" uses numpy if it
+    is installed and kanji_set is KANJI_SET and "filter" otherwise, see
+    benchmarks/extract.py.
+    """
+    check_extractor(extractor)
+    custom_set = kanji_set is not KANJI_SET and kanji_set != KANJI_SET
+    if extractor == "auto":
+        if get_numpy() is not None and not custom_set:
+            extractor = "numpy"
+        else:
+            extractor = "filter"
+    if custom_set and extractor != "filter":
+        raise ValueError(f"the {extractor} extractor can't count a custom kanji_set")
+    EXTRACTORS[extractor](text, counter, kanji_set)
+
+
+@lru_cache(maxsize=32)
+def _slots_of(kanji):
+    # kanji has to be a frozenset so gradings can share the result
+    np = get_numpy()
+    slots = []
+    for k in kanji:
+        try:
+            slots.append(kanji_slot(k))
+        except ValueError:
+            continue
+    slots.sort()
+    if np is not None:
+        return np.array(slots, dtype=np.intp)
+    return slots
+
+
+class KanjiCounter(Mapping):
+    """Counter of kanji backed by one integer per slot of the kanji range
+
+    Behaves like a read-only Counter, missing kanji count 0 and only kanji
+    that occurred are listed by keys/values/items. Characters outside the
+    kanji range are ignored by update. Uses numpy when it's installed.
+    """
+
+    def __init__(self, iterable=None):
+        np = get_numpy()
+        if np is not None:
+            self._counts = np.zeros(KANJI_SLOTS, dtype=np.int64)
+        else:
+            self._counts = array("q", bytes(8 * KANJI_SLOTS))
+        if iterable is not None:
+            self.update(iterable)
+
+    def __getitem__(self, kanji):
+        try:
+            return int(self._counts[kanji_slot(kanji)])
+        except (ValueError, TypeError):
+            return 0
+
+    def get(self, kanji, default=None):
+        count = self[kanji]
+        return count if count else default
+
+    def __contains__(self, kanji):
+        return self[kanji] > 0
+
+    def _nonzero_slots(self):
+        np = get_numpy()
+        if np is not None:
+            return np.flatnonzero(self._counts).tolist()
+        return [i for i, c in enumerate(self._counts) if c]
+
+    def __iter__(self):
+        return map(slot_kanji, self._nonzero_slots())
+
+    def __len__(self):
+        np = get_numpy()
+        if np is not None:
+            return int(np.count_nonzero(self._counts))
+        return len(self._counts) - self._counts.count(0)
+
+    def __repr__(self):
+        return f"KanjiCounter({dict(self.most_common())})"
+
+    def update(self, iterable):
+        """add a str or iterable of kanji, or a mapping of kanji to counts"""
+        np = get_numpy()
+        if isinstance(iterable, KanjiCounter):
+            if np is not None:
+                self._counts += iterable._counts
+            else:
+                for i, c in enumerate(iterable._counts):
+                    self._counts[i] += c
+        elif isinstance(iterable, Mapping):
+            for kanji, count in iterable.items():
+                try:
+                    self._counts[kanji_slot(kanji)] += count
+                except (ValueError, TypeError):
+                    continue
+        elif isinstance(iterable, str):
+            count_kanji(iterable, self)
+        else:
+            for kanji, count in Counter(iterable).items():
+                try:
+                    self._counts[kanji_slot(kanji)] += count
+                except ValueError:
+                    continue
+
+    def total(self):
+        return int(sum(self._counts))
+
+    def most_common(self, n=None):
+        return Counter(dict(self.items())).most_common(n)
+
+    def copy(self):
+        new = KanjiCounter()
+        new._counts[:] = self._counts
+        return new
+
+    def value_counts(self, cap, kanji=None):
+        """list of how many kanji occurred exactly i times, index cap holds >= cap
+
+        kanji restricts the result to a frozenset, e.g. get_all_in_grading()
+        """
+        np = get_numpy()
+        if kanji is None:
+            counts = self._counts
+        elif np is not None:
+            counts = self._counts[_slots_of(kanji)]
+        else:
+            counts = [self._counts[i] for i in _slots_of(kanji)]
+        if np is not None:
+            counts = counts[counts > 0]
+            return np.bincount(np.minimum(counts, cap), minlength=cap + 1).tolist()
+        hist = [0] * (cap + 1)
+        for count in counts:
+            if count > 0:
+                hist[min(count, cap)] += 1
+        return hist
+
+
+# snapshot files: this header, then one little-endian int64 per slot
+SNAPSHOT_MAGIC = b"KGCOUNTS"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<8sHHI")
+
+
+def save_counts(counter, fp):
+    """write counter as a snapshot to the path or binary file fp
+
+    a counter that isn't a KanjiCounter is converted first, which raises
+    ValueError for characters outside the kanji range. A path is replaced
+    by a new file instead of being rewritten, so snapshots that are mapped
+    by load_counts keep their counts.
+    """
+    np = get_numpy()
+    if not isinstance(counter, KanjiCounter):
+        for kanji, count in counter.items():
+            if count and kanji not in KANJI_SET:
+                raise ValueError(f"{kanji!r} is not in the kanji range")
+        counter = KanjiCounter(counter)
+    if np is not None:
+        data = counter._counts.astype("<i8", copy=False).tobytes()
+    else:
+        counts = array("q", counter._counts)
+        if sys.byteorder == "big":
+            counts.byteswap()
+        data = counts.tobytes()
+    header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, KANJI_SLOTS)
+    if hasattr(fp, "write"):
+        fp.write(header + data)
+        return
+    fp = os.fspath(fp)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(fp) or ".", prefix=".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(data)
+        os.replace(tmp, fp)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _check_header(header):
+    if len(header) < _SNAPSHOT_HEADER.size:
+        raise ValueError("not a kanjigrid count snapshot, too short")
+    magic, version, _, slots = _SNAPSHOT_HEADER.unpack(header)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not a kanjigrid count snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"can't read count snapshots of version {version}")
+    if slots != KANJI_SLOTS:
+        raise ValueError(f"snapshot has {slots} slots instead of {KANJI_SLOTS}")
+
+
+def load_counts(fp, use_mmap=True):
+    """return the KanjiCounter saved in the path or binary file fp
+
+    with numpy and a path the counts are memory mapped copy-on-write, so
+    nothing is read until it's used and updates never reach the file
+    """
+    np = get_numpy()
+    counter = KanjiCounter.__new__(KanjiCounter)
+    if hasattr(fp, "read"):
+        header = fp.read(_SNAPSHOT_HEADER.size)
+        _check_header(header)
+        data = fp.read(8 * KANJI_SLOTS)
+    else:
+        with open(fp, "rb") as f:
+            header = f.read(_SNAPSHOT_HEADER.size)
+            _check_header(header)
+            if np is not None and use_mmap:
+                counter._counts = np.memmap(
+                    f,
+                    dtype="<i8",
+                    mode="c",
+                    offset=_SNAPSHOT_HEADER.size,
+                    shape=(KANJI_SLOTS,),
+                )
+                return counter
+            data = f.read(8 * KANJI_SLOTS)
+    if len(data) != 8 * KANJI_SLOTS:
+        raise ValueError("count snapshot is truncated")
+    if np is not None:
+        counter._counts = np.frombuffer(data, dtype="<i8").astype(np.int64)
+    else:
+        counter._counts = array("q", data)
+        if sys.byteorder == "big":
+            counter._counts.byteswap()
+    return counter
+
+
+def merge_counts(sources):
+    """return a KanjiCounter with the sum of the snapshots in sources
+
+    sources are paths or binary files, they are added slot by slot
+    """
+    total = KanjiCounter()
+    for source in sources:
+        total.update(load_counts(source))
+    return total
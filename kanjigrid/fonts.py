@@ -0,0 +1,91 @@
+from PIL import ImageFont
+from functools import lru_cache
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+# the fonts the "Kanji" and "Header" aliases stand for, the first one found is used
+FONT_ALIASES = {
+    "Kanji": [
+        "NotoSansJP-Regular.otf",
+        "yumin.ttf",
+        "meiryo.ttc",
+        "YuGothM.ttc",
+        "msgothic.ttc",
+        "msmincho.ttc",
+    ],
+    "Header": ["Helvetica.ttf", "cambria.ttc", "georgia.ttf", "times.ttf"],
+}
+
+
+def font_dirs():
+    """the directories Pillow searches for fonts given by file name"""
+    if sys.platform == "win32":
+        windir = os.environ.get("WINDIR")
+        return [os.path.join(windir, "fonts")] if windir else []
+    if sys.platform == "darwin":
+        return [
+            "/Library/Fonts/",
+            "/System/Library/Fonts/",
+            os.path.expanduser("~/Library/Fonts/"),
+        ]
+    home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    return [os.path.join(d, "fonts") for d in [home, *data_dirs.split(":")]]
+
+
+@lru_cache(maxsize=None)
+def font_index():
+    """file name -> path of every font in font_dirs, built on first use
+
+    call font_index.cache_clear() after installing fonts
+    """
+    index = dict()
+    for directory in font_dirs():
+        for root, _, files in os.walk(directory):
+            for name in files:
+                index.setdefault(name, os.path.join(root, name))
+    logger.debug("Indexed %d fonts", len(index))
+    return index
+
+
+def find_font(name):
+    """return the path of the font file name or None
+
+    like Pillow a path that exists is used as it is, other names are
+    looked up in the font directories
+    """
+    if os.path.isfile(name):
+        return name
+    return font_index().get(name)
+
+
+@lru_cache(maxsize=64)
+def _truetype(path, size):
+    # FreeTypeFont objects are shared by every Gridder that asks for the same font
+    font = ImageFont.truetype(path, size=size)
+    logger.info("Loaded %s in size %d", path, size)
+    return font
+
+
+def load_font(fontpath, fontsize):
+    """return the FreeTypeFont for a path, a font name or the "Kanji"/"Header" alias"""
+    if fontpath in FONT_ALIASES:
+        for name in FONT_ALIASES[fontpath]:
+            path = find_font(name)
+            if path is not None:
+                return _truetype(path, fontsize)
+        raise OSError(
+            f"None of the {fontpath} fonts {', '.join(FONT_ALIASES[fontpath])}"
+            " is installed"
+        )
+    path = find_font(fontpath)
+    try:
+        return _truetype(fontpath if path is None else path, fontsize)
+    except OSError:
+        logger.error(
+            "Couldn't find the font %s. Is it installed for all users?", fontpath
+        )
+        raise
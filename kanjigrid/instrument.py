@@ -0,0 +1,37 @@
+from threading import Lock
+
+# keys of info that are amounts and get added up, the others are labels
+# like the name of a section or the path of a font
+MEASURES = ("bytes", "cells", "chars", "pixels", "sections")
+
+
+class StageStats:
+    """sums up the stages a Gridder reports, pass it as Gridder(instrument=...)
+
+    any callable taking (stage, seconds, info) works as instrument, info is
+    a dict like {"name": 3, "cells": 120, "pixels": 96000}. This one adds up
+    the calls, seconds and MEASURES per stage and can be shared by Gridders
+    in several threads.
+    """
+
+    def __init__(self):
+        self.stages = dict()
+        self._lock = Lock()
+
+    def __call__(self, stage, seconds, info):
+        with self._lock:
+            totals = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0})
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+            for key in MEASURES:
+                if key in info:
+                    totals[key] = totals.get(key, 0) + info[key]
+
+    def as_dict(self):
+        """copy of the totals as {stage: {"calls": ..., "seconds": ..., ...}}"""
+        with self._lock:
+            return {stage: dict(totals) for stage, totals in self.stages.items()}
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
@@ -1,40 +1,149 @@
-from PIL import Image, ImageDraw, ImageFont
-from collections import Counter
+from PIL import Image, ImageDraw
+from bisect import bisect_right
+from io import BytesIO
+import codecs
+import copy
+import mmap
+import os
+from collections import Counter, namedtuple
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from math import ceil
+from pathlib import Path
+from threading import RLock
+from time import perf_counter
+from .atlas import default_atlas, render_lock
+from .counter import (
+    KANJI_SET,
+    KanjiCounter,
+    check_extractor,
+    count_kanji,
+    load_counts,
+    save_counts,
+)
+from .fonts import load_font
+from .palette import Palette, rgb
+from .vector import iter_html, iter_svg
 
 
-def load_font(fontpath, fontsize):
-    if fontpath == "Kanji":
-        fonts = [
-            "NotoSansJP-Regular.otf",
-            "yumin.ttf",
-            "meiryo.ttc",
-            "YuGothM.ttc",
-            "msgothic.ttc",
-            "msmincho.ttc",
-        ]
-        for f in fonts:
-            try:
-                fl = ImageFont.truetype(f, size=fontsize)
-            except OSError:
-                continue
-            print(f"Loaded {f}")
-            return fl
-    elif fontpath == "Header":
-        fonts = ["Helvetica.ttf", "cambria.ttc", "georgia.ttf", "times.ttf"]
-        for f in fonts:
-            try:
-                fl = ImageFont.truetype(f, size=fontsize)
-            except OSError:
-                continue
-            print(f"Loaded {f}")
-            return fl
+# bytes (or characters for text streams) read at once by the feed_* methods
+CHUNK_SIZE = 1 << 20
+
+
+def _read_chunks(stream, chunk_size):
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _decode_chunks(chunks, encoding):
+    # an incremental decoder keeps multibyte characters split between chunks intact
+    decoder = None
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(encoding)()
+        yield decoder.decode(chunk)
+    if decoder is not None:
+        yield decoder.decode(b"", final=True)
+
+
+# kanji set of the Gridder that started the worker process, see Gridder.feed_files
+_worker_kanji_set = None
+
+
+def _init_count_worker(kanji_set):
+    # None stands for KANJI_SET, which the extractors can only recognize by identity
+    global _worker_kanji_set
+    _worker_kanji_set = KANJI_SET if kanji_set is None else kanji_set
+
+
+def _count_files(paths, chunk_size, encoding, extractor):
+    counter = Counter()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in _decode_chunks(_read_chunks(f, chunk_size), encoding):
+                count_kanji(chunk, counter, extractor, _worker_kanji_set)
+    return counter
+
+
+# a rectangular part of the grid, data depends on kind:
+# "header" -> title, "subgrid" -> sorted kanji, "bar" -> [(width, color)], "text" -> str
+Section = namedtuple("Section", ["kind", "name", "x", "y", "width", "height", "data"])
+
+
+@lru_cache(maxsize=64)
+def _sorted_kanji(kanji):
+    # the levels of the built-in gradings are frozensets, so they only get sorted once
+    return tuple(sorted(kanji))
+
+
+def _section_stage(section):
+    # the part of the grid a section belongs to, as reported to Gridder.instrument
+    if section.name in ("addition", "stats"):
+        return section.name
+    if section.kind == "bar":
+        return "bar_graph"
+    return "level_header" if section.kind == "header" else "level_grid"
+
+
+class GridLayout:
+    """Size of a grid and the position of every section in it"""
+
+    def __init__(self, width, height, sections):
+        self.width = width
+        self.height = height
+        self.sections = sections
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    @property
+    def pixels(self):
+        return self.width * self.height
+
+    def geometry(self):
+        """the position and size of every section, without their contents"""
+        return [section[:6] for section in self.sections]
+
+    def __repr__(self):
+        return f"GridLayout({self.width}x{self.height}, {len(self.sections)} sections)"
+
+
+def save_grid(
+    grid,
+    fp,
+    format=None,
+    compress_level=6,
+    optimize=False,
+    lossless=True,
+    quality=80,
+    method=4,
+):
+    """save grid as PNG or WEBP, with the settings that trade encode time for size
+
+    format defaults to WEBP for .webp paths and PNG otherwise.
+    PNG: compress_level from 0 (fastest) to 9 (smallest), optimize searches harder.
+    WEBP: lossless or lossy with quality, method from 0 (fastest) to 6 (smallest).
+    """
+    if format is None:
+        is_webp = isinstance(fp, (str, os.PathLike)) and str(fp).lower().endswith(".webp")
+        format = "WEBP" if is_webp else "PNG"
+    format = format.upper()
+    if format == "PNG":
+        grid.save(fp, "PNG", compress_level=compress_level, optimize=optimize)
+    elif format == "WEBP":
+        if grid.mode == "P":
+            grid = grid.convert("RGB")
+        grid.save(fp, "WEBP", lossless=lossless, quality=quality, method=method)
     else:
-        try:
-            return ImageFont.truetype(fontpath, size=fontsize)
-        except OSError as e:
-            print("Couldn't find the provided font. Is it installed for all users?")
-        raise e
+        raise ValueError(f"Can't save grids as {format}, use PNG or WEBP")
 
 
 class Gridder:
@@ -58,10 +167,21 @@ class Gridder:
         header_font_color="#000000",
         background_color="#FFFFFF",
         kanji_background_color="#FFFFFF",
+        glyph_atlas=None,
+        compact_counter=False,
+        extractor="auto",
+        executor=None,
+        max_concurrency=None,
+        mode="RGB",
+        palette_shades=16,
+        instrument=None,
     ):
         super(Gridder, self).__init__()
-        self.kfont = load_font(kanjifontpath, kanjifontsize)
-        self.hfont = load_font(headerfontpath, headerfontsize)
+        # called as instrument(stage, seconds, info) for the stages of font
+        # loading, feed_text and make_grid, see StageStats
+        self.instrument = instrument
+        self.kfont = self._load_font(kanjifontpath, kanjifontsize)
+        self.hfont = self._load_font(headerfontpath, headerfontsize)
         if colordict is None:
             self.colordict = {
                 1: "#cc3232",
@@ -72,11 +192,10 @@ class Gridder:
             }
         else:
             self.colordict = colordict
-        # i might want to use a more restricted set as this also contains hanzi and radicals
-        self.all_kanji_set = set(
-            chr(uni) for uni in range(ord("一"), ord("龯") + 1)
-        ) | set("〆々")
-        self.kcounter = Counter()
+        self.all_kanji_set = KANJI_SET
+        check_extractor(extractor)
+        self.extractor = extractor
+        self.kcounter = KanjiCounter() if compact_counter else Counter()
         self.background_color = background_color
         self.kanji_background_color = kanji_background_color
         self.kanji_font_color = kanji_font_color
@@ -88,233 +207,769 @@ class Gridder:
         self.columns = columns
         self.bar_hori_border = bar_hori_border
         self.bar_vert_border = bar_vert_border
+        self.glyph_atlas = default_atlas if glyph_atlas is None else glyph_atlas
+        # last make_grid call as (arguments, layout, image, cell positions), see repaint
+        self._render = None
+        # counts added since the last make_grid call
+        self._changes = Counter()
+        # guards kcounter when feeds and renders run in several threads
+        self._count_lock = RLock()
+        # used by the *_async methods, None is the default executor of the loop
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        # "P" draws palette indices into an "L" image and adds the palette at the end
+        if mode not in ("RGB", "P"):
+            raise ValueError(f"mode has to be RGB or P, not {mode}")
+        self.mode = mode
+        self.palette_shades = palette_shades
+        self._palette = None
+        # kanji -> finished cell image and kanji set -> histogram, only set
+        # on the Gridder make_grids renders with
+        self._cells = None
+        self._histograms = None
+
+    def _report(self, stage, start, **info):
+        # only called when self.instrument is set
+        self.instrument(stage, perf_counter() - start, info)
+
+    def _load_font(self, fontpath, fontsize):
+        if self.instrument is None:
+            return load_font(fontpath, fontsize)
+        start = perf_counter()
+        font = load_font(fontpath, fontsize)
+        self._report("load_font", start, path=fontpath, size=fontsize)
+        return font
 
     def _clean_text(self, uctext):
         return "".join(filter(self.all_kanji_set.__contains__, uctext))
 
-    def _get_vert_cat(self, im1, im2):
-        res = Image.new("RGB", (im1.width, im1.height + im2.height))
-        res.paste(im1, (0, 0))
-        res.paste(im2, (0, im1.height))
-        return res
-
-    def _get_hori_cat(self, im1, im2):
-        res = Image.new("RGB", (im1.width + im2.width, im1.height))
-        res.paste(im1, (0, 0))
-        res.paste(im2, (im1.width, 0))
-        return res
-
-    def _draw_on_img(self, text, img, mode):
-        if mode == "Kanji":
-            font = self.kfont
-            fontfam = self.kfont.font.family
-            fc = self.kanji_font_color
-        if mode == "Header":
-            font = self.hfont
-            fontfam = self.hfont.font.family
-            fc = self.header_font_color
-        draw = ImageDraw.Draw(img)
+    def _glyph_offset(self, fontfam):
+        # some fonts sit too low in their cell and get moved up
         if "Noto Sans JP" in fontfam:
-            draw.text((0, -self.kfont.size / 3.5), text, font=font, fill=fc)
+            return -self.kfont.size / 3.5
         elif "Meiryo" in fontfam:
-            draw.text((0, -self.kfont.size / 5), text, font=font, fill=fc)
-        else:
-            draw.text((0, 0), text, font=font, fill=fc)
-
-    def _generate_kanji_picto(self, kan, fc=None, bgc=None):
-        if bgc is None:
-            bgc = self.kanji_background_color
-        if fc is None:
-            fc = self.kanji_font_color
-        picto = Image.new("RGB", (self.kfont.size, self.kfont.size), color=bgc)
-        self._draw_on_img(kan, picto, "Kanji")
-        return picto
-
-    def _generate_header(self, title, fc=None, bgc=None):
-        if bgc is None:
-            bgc = self.background_color
-        if fc is None:
-            fc = self.header_font_color
-        width = self.kfont.size * self.columns
-        head = Image.new("RGB", (width, self.hfont.size), color=self.background_color)
-        pad_bot = Image.new(
-            "RGB", (width, self.padding_under_header), color=self.background_color
+            return -self.kfont.size / 5
+        return 0
+
+    def _kanji_mask(self, kan):
+        return self.glyph_atlas.get_mask(
+            kan,
+            self.kfont,
+            self.kfont.size,
+            self._glyph_offset(self.kfont.font.family),
         )
-        pad_top = Image.new(
-            "RGB", (width, self.padding_above_header), color=self.background_color
+
+    def _text_mask(self, text, size, xy):
+        mask = Image.new("L", size, 0)
+        with render_lock:
+            ImageDraw.Draw(mask).text(xy, text, font=self.hfont, fill=255)
+        return mask
+
+    def _get_palette(self):
+        key = (
+            self.palette_shades,
+            self.background_color,
+            self.header_font_color,
+            self.kanji_font_color,
+            self.kanji_background_color,
+            tuple(self.colordict.items()),
         )
-        head = self._get_vert_cat(head, pad_bot)
-        self._draw_on_img(title, head, mode="Header")
-        head = self._get_vert_cat(pad_top, head)
-        return head
+        if self._palette is None or self._palette[0] != key:
+            palette = Palette(self.palette_shades)
+            palette.index(self.background_color)
+            palette.ramp(self.background_color, self.header_font_color)
+            for bgc in [self.kanji_background_color, *self.colordict.values()]:
+                palette.ramp(bgc, self.kanji_font_color)
+            self._palette = (key, palette)
+        return self._palette[1]
+
+    def _ink(self, color):
+        # what paste expects as a color for images of self.mode
+        if self.mode == "P":
+            return self._get_palette().index(color)
+        return rgb(color)
+
+    def _new_image(self, size):
+        if self.mode == "P":
+            return Image.new("L", size, self._ink(self.background_color))
+        return Image.new("RGB", size, self._ink(self.background_color))
+
+    def _finish_image(self, img):
+        if self.mode == "P":
+            # turns the "L" image of palette indices into a "P" image in place
+            img.putpalette(self._get_palette().data)
+        return img
+
+    def _paste_mask(self, img, x, y, mask, bgc, fc):
+        # draws fc through mask onto an area of img that has the color bgc
+        if self.mode == "RGB":
+            img.paste(self._ink(fc), (x, y, x + mask.width, y + mask.height), mask)
+            return
+        palette = self._get_palette()
+        shaded = mask.point(palette.ramp(bgc, fc))
+        if img.mode == "P":
+            # finished images, see repaint
+            shaded.putpalette(palette.data)
+        img.paste(shaded, (x, y))
+
+    def _kanji_color(self, kcount):
+        # the highest colordict key that is <= kcount decides the color
+        skeys = sorted(self.colordict.keys())
+        pos = bisect_right(skeys, kcount)
+        if pos == 0:
+            return self.kanji_background_color
+        return self.colordict[skeys[pos - 1]]
+
+    def _add_counts(self, counts):
+        with self._count_lock:
+            self.kcounter.update(counts)
+            if self._render is not None:
+                self._changes.update(counts)
+
+    def _count_text(self, uctext):
+        with self._count_lock:
+            if self._render is None:
+                count_kanji(uctext, self.kcounter, self.extractor, self.all_kanji_set)
+                return
+        # after a make_grid the new counts are needed on their own for repaint
+        counts = Counter()
+        count_kanji(uctext, counts, self.extractor, self.all_kanji_set)
+        self._add_counts(counts)
 
     def feed_text(self, uctext):
-        self.kcounter.update(self._clean_text(uctext))
-
-    def dry_grid(self, grading):
-        """return the total size of the grid with the current settings soontm"""
-        # col = self.grid_settings["columns"]
-        # padtop = self.grid_settings["padding_above_header"]
-        # padbot = self.grid_settings["padding_under_header"]
-        # sidepad = self.grid_settings["grid_side_padding"]
-        # tot width = 2*sidepad + ksize*columns
-        # header1 = (padtop+padbot+self.hfont.size)
-        # kanji1 = math.ceil((Anzahl Kanji)/col) * ksize
-        pass
-
-    def _generate_subgrid(self, grade):
-        grade = sorted(list(grade))
-        width = self.kfont.size * self.columns
-        height = self.kfont.size * (ceil(len(grade) / self.columns))
-        img = Image.new("RGB", (width, height), color=self.background_color)
-        maxkc = max(self.colordict.keys())
-        skeys = sorted(list(self.colordict.keys()), reverse=True)
-        for k in range(len(grade)):
-            kanji = grade[k]
-            kcount = self.kcounter.get(kanji, 0)
-            if kcount >= maxkc:
-                kanjipic = self._generate_kanji_picto(
-                    kanji, bgc=self.colordict[max(self.colordict.keys())]
+        if self.instrument is None:
+            self._count_text(uctext)
+            return
+        start = perf_counter()
+        self._count_text(uctext)
+        self._report("feed_text", start, chars=len(uctext))
+
+    def feed_iter(self, chunks, encoding="utf-8"):
+        """feed an iterable of str or bytes chunks, bytes are decoded incrementally"""
+        for chunk in _decode_chunks(chunks, encoding):
+            self.feed_text(chunk)
+
+    def feed_stream(self, stream, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+        """feed a text or binary file object chunk_size at a time"""
+        self.feed_iter(_read_chunks(stream, chunk_size), encoding)
+
+    def feed_file(self, path, chunk_size=CHUNK_SIZE, encoding="utf-8", use_mmap=False):
+        """feed a file without reading it into memory as a whole"""
+        with open(path, "rb") as f:
+            if not use_mmap:
+                self.feed_stream(f, chunk_size, encoding)
+                return
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files can't be mapped
+                return
+            with mm:
+                self.feed_iter(
+                    (mm[i : i + chunk_size] for i in range(0, len(mm), chunk_size)),
+                    encoding,
                 )
-            else:
-                if res := list(filter(lambda x: x <= kcount, skeys)):
-                    kanjipic = self._generate_kanji_picto(
-                        kanji,
-                        bgc=self.colordict.get(res[0], self.kanji_background_color),
-                    )
-                else:
-                    kanjipic = self._generate_kanji_picto(
-                        kanji, bgc=self.kanji_background_color
-                    )
-            img.paste(
-                kanjipic,
-                (k * self.kfont.size % width, (k * self.kfont.size // width) * self.kfont.size),
-            )
-        return img
 
-    def _generate_stats(self, grading):
-        width = self.kfont.size * self.columns
-        img = Image.new("RGB", (self.kfont.size * self.columns, 0))
-        head = self._generate_header("Kanji Stats:")
-        for key in sorted(list(self.colordict.keys()), reverse=True):
-            tempimg = Image.new("RGB", (width, self.hfont.size), color=self.background_color)
-            if key == max(self.colordict.keys()):
-                statstr = f"{key}+ occurrences: "
-                statstr += str(sum(k >= key for k in self.kcounter.values()))
+    def feed_files(
+        self,
+        paths,
+        workers=None,
+        files_per_task=1,
+        chunk_size=CHUNK_SIZE,
+        encoding="utf-8",
+        pattern="*",
+    ):
+        """count many files in a process pool, paths can also be a directory or one file
+
+        files matching pattern are searched recursively in a directory.
+        workers defaults to the number of CPUs, workers=1 counts in this process.
+        """
+        if isinstance(paths, (str, os.PathLike)):
+            if Path(paths).is_dir():
+                paths = sorted(p for p in Path(paths).rglob(pattern) if p.is_file())
             else:
-                statstr = f"{key} occurrences: "
-                statstr += str(sum(k == key for k in self.kcounter.values()))
-            draw = ImageDraw.Draw(tempimg)
-            draw.text(
-                (self.hfont.size, 0), statstr, font=self.hfont, fill=self.header_font_color
-            )
-            img = self._get_vert_cat(img, tempimg)
-        img = self._get_vert_cat(head, img)
-        grade_kanji = grading.get_all_in_grading()
-        zero_occ = len(grade_kanji.difference(self.kcounter.keys()))
-        occ_percen = 100 * (len(grade_kanji) - zero_occ) / len(grade_kanji)
-        temp_str = f"0 occurrences: {zero_occ} " f"({occ_percen:.2f}% occurred)"
-        tempimg = Image.new("RGB", (width, self.hfont.size), color=self.background_color)
-        draw = ImageDraw.Draw(tempimg)
-        draw.text(
-            (self.hfont.size, 0), temp_str, font=self.hfont, fill=self.header_font_color
+                paths = [paths]
+        paths = list(paths)
+        shards = [
+            paths[i : i + files_per_task] for i in range(0, len(paths), files_per_task)
+        ]
+        count = partial(
+            _count_files,
+            chunk_size=chunk_size,
+            encoding=encoding,
+            extractor=self.extractor,
         )
-        img = self._get_vert_cat(img, tempimg)
-        return img
+        kanji_set = None if self.all_kanji_set is KANJI_SET else self.all_kanji_set
+        if workers == 1:
+            _init_count_worker(kanji_set)
+            for counter in map(count, shards):
+                self._add_counts(counter)
+            return
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_count_worker,
+            initargs=(kanji_set,),
+        ) as executor:
+            for counter in executor.map(count, shards):
+                self._add_counts(counter)
+
+    def save_counts(self, fp):
+        """write kcounter to the path or binary file fp as a compact snapshot
+
+        see load_counts and kanjigrid.counter.merge_counts
+        """
+        with self._count_lock:
+            save_counts(self.kcounter, fp)
+
+    def load_counts(self, fp, use_mmap=False):
+        """add the counts of a snapshot written by save_counts, like feed_text
+
+        the counts are read into memory. With use_mmap and without earlier
+        counts or render the memory mapped snapshot becomes kcounter as it
+        is, so loading costs next to nothing, but the file mustn't be
+        truncated or rewritten in place while the Gridder is used.
+        """
+        counts = load_counts(fp, use_mmap)
+        with self._count_lock:
+            if self._render is None and not self.kcounter:
+                self.kcounter = counts
+                return
+        self._add_counts(counts)
 
-    def _generate_addition(self, grading):
-        width = self.kfont.size * self.columns
-        head = self._generate_header("Additional Kanji:")
-        out_kanji = {k for k in self.kcounter.keys() if not grading.is_in_grading(k)}
-        subgrid = self._generate_subgrid(out_kanji)
-        concat = self._get_vert_cat(head, subgrid)
-        return concat
+    def _count_histogram(self, kanji=None):
+        """list of how many kanji occurred i times, the highest colordict key holds all above
 
-    def _generate_bar_graph(self, grading):
+        kanji restricts the histogram to a frozenset like get_all_in_grading()
+        """
+        if self._histograms is not None:
+            hist = self._histograms.get(kanji)
+            if hist is None:
+                hist = self._histograms[kanji] = self._compute_histogram(kanji)
+            return hist
+        return self._compute_histogram(kanji)
+
+    def _compute_histogram(self, kanji):
+        cap = max(self.colordict.keys())
+        if isinstance(self.kcounter, KanjiCounter):
+            return self.kcounter.value_counts(cap, kanji)
+        hist = [0] * (cap + 1)
+        for k, count in self.kcounter.items():
+            if count > 0 and (kanji is None or k in kanji):
+                hist[min(count, cap)] += 1
+        return hist
+
+    def level_histograms(self, grading):
+        """return a count histogram (see _count_histogram) for every level of grading"""
+        return {
+            key: self._count_histogram(frozenset(val["Kanji"]))
+            for key, val in grading.gradings.items()
+        }
+
+    def _bar_splits(self, grading):
         width = self.kfont.size * self.columns - 2 * self.bar_vert_border
         grade_kanji = grading.get_all_in_grading()
+        hist = self._count_histogram(grade_kanji)
         splits = dict()
+        prev_key = None
         for key in sorted(list(self.colordict.keys()), reverse=True):
-            if key == max(self.colordict.keys()):
-                splits[key] = sum(
-                    self.kcounter[k] >= key
-                    for k in self.kcounter.keys()
-                    if grading.is_in_grading(k)
-                )
+            if prev_key is None:
+                splits[key] = hist[key]
             else:
-                splits[key] = sum(
-                    self.kcounter[k] >= key and self.kcounter[k] < prev_key
-                    for k in self.kcounter.keys()
-                    if grading.is_in_grading(k)
-                )
+                splits[key] = sum(hist[key:prev_key])
             prev_key = key
-        splits[0] = len(grade_kanji.difference(self.kcounter.keys()))
+        splits[0] = len(grade_kanji) - sum(hist)
         factor = width / sum(splits.values())
         for k in sorted(list(splits.keys()), reverse=True):
             splits[k] = int(splits[k] * factor)
-            if k == min(splits.keys()):
+            if k == 0:
                 splits[k] = splits[k] + (width - sum(splits.values()))
-        bar = Image.new("RGB", (0, self.kfont.size))
-        for k in sorted(list(splits.keys()), reverse=True):
-            part = Image.new(
-                "RGB",
-                (splits[k], self.kfont.size),
-                color=self.colordict.get(k, self.background_color),
-            )
-            bar = self._get_hori_cat(bar, part)
-        pad = Image.new(
-            "RGB",
-            (width + 2 * self.bar_vert_border, self.bar_padding),
-            color=self.background_color,
-        )
-        horz_border = Image.new(
-            "RGB",
-            (width + 2 * self.bar_vert_border, self.bar_hori_border),
-            color=self.header_font_color,
-        )
-        vert_border = Image.new(
-            "RGB", (self.bar_vert_border, self.kfont.size), color=self.header_font_color
-        )
-        bar = self._get_hori_cat(vert_border, bar)
-        bar = self._get_hori_cat(bar, vert_border)
-        bar = self._get_vert_cat(horz_border, bar)
-        bar = self._get_vert_cat(bar, horz_border)
-        bar = self._get_vert_cat(pad, bar)
-        # bar = self._get_vert_cat(bar, pad)
-        return bar
+        return [
+            (splits[k], self.colordict.get(k, self.background_color))
+            for k in sorted(list(splits.keys()), reverse=True)
+        ]
 
-    def make_grid(
+    def _stats_lines(self, grading):
+        maxkey = max(self.colordict.keys())
+        hist = self._count_histogram()
+        lines = []
+        for key in sorted(list(self.colordict.keys()), reverse=True):
+            if key == maxkey:
+                lines.append(f"{key}+ occurrences: {hist[key]}")
+            else:
+                lines.append(f"{key} occurrences: {hist[key]}")
+        grade_kanji = grading.get_all_in_grading()
+        zero_occ = len(grade_kanji) - sum(self._count_histogram(grade_kanji))
+        occ_percen = 100 * (len(grade_kanji) - zero_occ) / len(grade_kanji)
+        lines.append(f"0 occurrences: {zero_occ} " f"({occ_percen:.2f}% occurred)")
+        return lines
+
+    def dry_grid(
         self,
         grading,
         outside_of_grading=False,
         stats=False,
         bar_graph=False,
     ):
-        grid = Image.new("RGB", (self.kfont.size * self.columns, 0))
+        """return the GridLayout make_grid would draw, without drawing anything"""
+        ksize = self.kfont.size
+        width = ksize * self.columns
+        header_height = (
+            self.padding_above_header + self.hfont.size + self.padding_under_header
+        )
+        sections = []
+        y = 0
+
+        def add(kind, name, height, data):
+            nonlocal y
+            sections.append(Section(kind, name, ksize, y, width, height, data))
+            y += height
+
+        def add_subgrid(name, title, kanjis):
+            if isinstance(kanjis, frozenset):
+                kanjis = _sorted_kanji(kanjis)
+            else:
+                kanjis = sorted(kanjis)
+            add("header", name, header_height, title)
+            add("subgrid", name, ksize * ceil(len(kanjis) / self.columns), kanjis)
+
         for key in grading.gradings.keys():
-            title = grading.gradings[key]["Name"]
-            kanjis = grading.gradings[key]["Kanji"]
-            head = self._generate_header(title)
-            subgrid = self._generate_subgrid(kanjis)
-            concat = self._get_vert_cat(head, subgrid)
-            grid = self._get_vert_cat(grid, concat)
+            add_subgrid(
+                key, grading.gradings[key]["Name"], grading.gradings[key]["Kanji"]
+            )
         if bar_graph:
-            img = self._generate_bar_graph(grading)
-            grid = self._get_vert_cat(grid, img)
+            add(
+                "bar",
+                "bar_graph",
+                self.bar_padding + 2 * self.bar_hori_border + ksize,
+                self._bar_splits(grading),
+            )
         if outside_of_grading:
-            img = self._generate_addition(grading)
-            grid = self._get_vert_cat(grid, img)
-
+            out_kanji = {k for k in self.kcounter.keys() if not grading.is_in_grading(k)}
+            add_subgrid("addition", "Additional Kanji:", out_kanji)
         if stats:
-            img = self._generate_stats(grading)
-            grid = self._get_vert_cat(grid, img)
-        pad_sides = Image.new(
-            "RGB", (self.kfont.size, grid.height), color=self.background_color
+            add("header", "stats", header_height, "Kanji Stats:")
+            for line in self._stats_lines(grading):
+                add("text", "stats", self.hfont.size, line)
+        return GridLayout(width + 2 * ksize, y + self.padding_under_header, sections)
+
+    def _paint_header(self, img, section, dy=0):
+        mask = self._text_mask(
+            section.data,
+            (section.width, self.hfont.size + self.padding_under_header),
+            (0, self._glyph_offset(self.hfont.font.family)),
+        )
+        self._paste_mask(
+            img,
+            section.x,
+            section.y - dy + self.padding_above_header,
+            mask,
+            self.background_color,
+            self.header_font_color,
+        )
+
+    def _paint_cell(self, img, x, y, kanji):
+        if self._cells is None:
+            self._draw_cell(img, x, y, kanji)
+            return
+        cell = self._cells.get(kanji)
+        if cell is None:
+            ksize = self.kfont.size
+            cell = self._cells[kanji] = self._new_image((ksize, ksize))
+            self._draw_cell(cell, 0, 0, kanji)
+        img.paste(cell, (x, y))
+
+    def _draw_cell(self, img, x, y, kanji):
+        ksize = self.kfont.size
+        bgc = self._kanji_color(self.kcounter.get(kanji, 0))
+        img.paste(self._ink(bgc), (x, y, x + ksize, y + ksize))
+        self._paste_mask(img, x, y, self._kanji_mask(kanji), bgc, self.kanji_font_color)
+
+    def _cell_positions(self, layout):
+        # kanji -> every (x, y) it is drawn at
+        positions = dict()
+        ksize = self.kfont.size
+        for section in layout.sections:
+            if section.kind != "subgrid":
+                continue
+            for k, kanji in enumerate(section.data):
+                positions.setdefault(kanji, []).append(
+                    (
+                        section.x + k % self.columns * ksize,
+                        section.y + k // self.columns * ksize,
+                    )
+                )
+        return positions
+
+    def _paint_subgrid(self, img, section, dy=0):
+        ksize = self.kfont.size
+        # only the rows that end up inside img
+        first_row = max(0, (dy - section.y) // ksize)
+        last_row = ceil((dy + img.height - section.y) / ksize)
+        for k in range(
+            first_row * self.columns, min(len(section.data), last_row * self.columns)
+        ):
+            self._paint_cell(
+                img,
+                section.x + k % self.columns * ksize,
+                section.y - dy + k // self.columns * ksize,
+                section.data[k],
+            )
+
+    def _paint_bar_graph(self, img, section, dy=0):
+        ksize = self.kfont.size
+        top = section.y - dy + self.bar_padding
+        right = section.x + section.width
+        bottom = top + 2 * self.bar_hori_border + ksize
+        img.paste(self._ink(self.header_font_color), (section.x, top, right, bottom))
+        x = section.x + self.bar_vert_border
+        top += self.bar_hori_border
+        for part_width, color in section.data:
+            img.paste(self._ink(color), (x, top, x + part_width, top + ksize))
+            x += part_width
+
+    def _paint_text(self, img, section, dy=0):
+        mask = self._text_mask(
+            section.data, (section.width, section.height), (self.hfont.size, 0)
         )
-        grid = self._get_hori_cat(grid, pad_sides)
-        grid = self._get_hori_cat(pad_sides, grid)
-        pad_bottom = Image.new(
-            "RGB", (grid.width, self.padding_under_header), color=self.background_color
+        self._paste_mask(
+            img,
+            section.x,
+            section.y - dy,
+            mask,
+            self.background_color,
+            self.header_font_color,
         )
-        grid = self._get_vert_cat(grid, pad_bottom)
+
+    def _paint_section(self, img, section, dy=0):
+        painter = {
+            "header": self._paint_header,
+            "subgrid": self._paint_subgrid,
+            "bar": self._paint_bar_graph,
+            "text": self._paint_text,
+        }[section.kind]
+        painter(img, section, dy)
+
+    def make_grid(
+        self,
+        grading,
+        outside_of_grading=False,
+        stats=False,
+        bar_graph=False,
+        max_pixels=None,
+    ):
+        instrument = self.instrument
+        with self._count_lock:
+            if instrument is not None:
+                start = perf_counter()
+            layout = self.dry_grid(grading, outside_of_grading, stats, bar_graph)
+            if instrument is not None:
+                self._report(
+                    "layout", start, sections=len(layout.sections), pixels=layout.pixels
+                )
+            if max_pixels is not None and layout.pixels > max_pixels:
+                raise ValueError(
+                    f"Grid of {layout.width}x{layout.height} exceeds {max_pixels} pixels"
+                )
+            if instrument is not None:
+                start = perf_counter()
+            grid = self._new_image(layout.size)
+            if instrument is not None:
+                self._report(
+                    "allocate",
+                    start,
+                    pixels=layout.pixels,
+                    bytes=layout.pixels * len(grid.getbands()),
+                )
+            for section in layout.sections:
+                if instrument is None:
+                    self._paint_section(grid, section)
+                    continue
+                start = perf_counter()
+                self._paint_section(grid, section)
+                self._report(
+                    _section_stage(section),
+                    start,
+                    name=section.name,
+                    cells=len(section.data) if section.kind == "subgrid" else 0,
+                    pixels=section.width * section.height,
+                )
+            if instrument is not None:
+                start = perf_counter()
+            self._finish_image(grid)
+            if instrument is not None:
+                self._report("finish", start)
+            self._render = (
+                (grading, outside_of_grading, stats, bar_graph),
+                layout,
+                grid,
+                None,
+            )
+            self._changes = Counter()
         return grid
+
+    def repaint(self):
+        """bring the image of the last make_grid call up to date after more feeding
+
+        only the cells whose color changed, the bar graph, the stats and a changed
+        additions grid are painted again, directly into that image, which is
+        returned. Falls back to a new make_grid if the layout changed size.
+        Changes made to kcounter by hand aren't noticed.
+        """
+        with self._count_lock:
+            if self._render is None:
+                raise ValueError("repaint needs a previous make_grid call")
+            args, layout, grid, positions = self._render
+            new_layout = self.dry_grid(*args)
+            if new_layout.geometry() != layout.geometry():
+                return self.make_grid(*args)
+            if self.instrument is not None:
+                start = perf_counter()
+            if positions is None:
+                positions = self._cell_positions(layout)
+            cells = 0
+            for kanji, added in self._changes.items():
+                count = self.kcounter.get(kanji, 0)
+                if self._kanji_color(count) == self._kanji_color(count - added):
+                    continue
+                for x, y in positions.get(kanji, ()):
+                    self._paint_cell(grid, x, y, kanji)
+                    cells += 1
+            for old, new in zip(layout.sections, new_layout.sections):
+                if new.kind == "header" or old.data == new.data:
+                    continue
+                grid.paste(
+                    self._ink(self.background_color),
+                    (new.x, new.y, new.x + new.width, new.y + new.height),
+                )
+                self._paint_section(grid, new)
+                if new.kind == "subgrid":
+                    positions = None
+            if self.instrument is not None:
+                self._report("repaint", start, cells=cells)
+            self._render = (args, new_layout, grid, positions)
+            self._changes = Counter()
+            return grid
+
+    def iter_bands(
+        self,
+        grading,
+        band_height=256,
+        outside_of_grading=False,
+        stats=False,
+        bar_graph=False,
+        layout=None,
+    ):
+        """yield (top, band) for horizontal bands of the grid from top to bottom
+
+        only one band of at most band_height rows exists at a time. layout is
+        the dry_grid of the same arguments if it's already known.
+        """
+        if layout is None:
+            with self._count_lock:
+                layout = self.dry_grid(grading, outside_of_grading, stats, bar_graph)
+        for top in range(0, layout.height, band_height):
+            height = min(band_height, layout.height - top)
+            band = self._new_image((layout.width, height))
+            with self._count_lock:
+                for section in layout.sections:
+                    if section.y < top + height and section.y + section.height > top:
+                        self._paint_section(band, section, top)
+            yield top, self._finish_image(band)
+
+    def make_grid_tiled(
+        self,
+        grading,
+        sink,
+        band_height=256,
+        outside_of_grading=False,
+        stats=False,
+        bar_graph=False,
+    ):
+        """render the grid band by band into sink, e.g. a PNGBandWriter
+
+        sink needs open(width, height, mode), write(band) and close()
+        """
+        # the counts mustn't change between the layout and the last band
+        with self._count_lock:
+            layout = self.dry_grid(grading, outside_of_grading, stats, bar_graph)
+            sink.open(layout.width, layout.height, self.mode)
+            try:
+                for _, band in self.iter_bands(
+                    grading, band_height, outside_of_grading, stats, bar_graph, layout
+                ):
+                    sink.write(band)
+            finally:
+                sink.close()
+        return sink
+
+    def iter_frames(self, sources, grading, stats=False, bar_graph=True):
+        """yield the grid after adding each of sources to the counts
+
+        a source is a text, a mapping of kanji to counts or the path of a
+        snapshot written by save_counts, given as a pathlib.Path as a str is a
+        text. The first frame comes from make_grid, the others repaint it, so
+        the same image is yielded every time. The additions grid is left out
+        as it would change the size of the frames.
+        """
+        for i, source in enumerate(sources):
+            if isinstance(source, str):
+                self.feed_text(source)
+            elif isinstance(source, Mapping):
+                self._add_counts(source)
+            else:
+                self.load_counts(source)
+            if i == 0:
+                grid = self.make_grid(grading, False, stats, bar_graph)
+            else:
+                grid = self.repaint()
+            yield grid
+
+    def make_animation(self, sources, grading, sink, stats=False, bar_graph=True):
+        """write a frame per source (see iter_frames) to sink, e.g. an APNGWriter
+
+        sink needs open(width, height, mode), write(frame) and close(), and
+        gets each frame as soon as it's painted
+        """
+        layout = self.dry_grid(grading, False, stats, bar_graph)
+        sink.open(layout.width, layout.height, self.mode)
+        try:
+            for frame in self.iter_frames(sources, grading, stats, bar_graph):
+                sink.write(frame)
+        finally:
+            sink.close()
+        return sink
+
+    def make_svg(
+        self,
+        grading,
+        outside_of_grading=False,
+        stats=False,
+        bar_graph=False,
+    ):
+        """return a generator of SVG markup for the grid make_grid would draw"""
+        layout = self.dry_grid(grading, outside_of_grading, stats, bar_graph)
+        return iter_svg(self, layout)
+
+    def make_html(
+        self,
+        grading,
+        outside_of_grading=False,
+        stats=False,
+        bar_graph=False,
+    ):
+        """return a generator of an HTML page with the sections of the grid"""
+        layout = self.dry_grid(grading, outside_of_grading, stats, bar_graph)
+        return iter_html(self, layout)
+
+    def _with_counter(self, kcounter):
+        # a Gridder sharing fonts, atlas and settings with this one
+        clone = copy.copy(self)
+        clone.kcounter = kcounter
+        clone._render = None
+        clone._changes = Counter()
+        clone._count_lock = RLock()
+        clone._semaphore = None
+        clone._cells = None
+        clone._histograms = None
+        return clone
+
+    def make_grids(
+        self,
+        gradings,
+        outside_of_grading=False,
+        stats=False,
+        bar_graph=False,
+        max_pixels=None,
+    ):
+        """render one grid per grading from the same counts, returned in the same order
+
+        every kanji cell is drawn once and pasted into all grids that contain
+        it, and the count histograms are shared. The grids don't become the
+        last make_grid call, so repaint doesn't update them.
+        """
+        with self._count_lock:
+            gridder = self._with_counter(self.kcounter)
+            gridder._cells = dict()
+            gridder._histograms = dict()
+            return [
+                gridder.make_grid(
+                    grading, outside_of_grading, stats, bar_graph, max_pixels
+                )
+                for grading in gradings
+            ]
+
+    def make_grid_batch(
+        self,
+        items,
+        grading,
+        outside_of_grading=False,
+        stats=False,
+        bar_graph=False,
+        max_workers=None,
+    ):
+        """render one grid per item in a thread pool, returned in the same order
+
+        an item is either a text or a mapping of kanji to counts like kcounter.
+        Fonts, glyph atlas and settings of this Gridder are shared by all of them.
+        """
+
+        def render(item):
+            if isinstance(item, Mapping):
+                gridder = self._with_counter(item)
+            else:
+                gridder = self._with_counter(type(self.kcounter)())
+                gridder.feed_text(item)
+            return gridder.make_grid(grading, outside_of_grading, stats, bar_graph)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(render, items))
+
+    async def _run_async(self, func, *args):
+        # runs func in self.executor, at most max_concurrency at a time
+        # asyncio is imported here as it's slow to import and only needed here
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if self.max_concurrency is None:
+            return await loop.run_in_executor(self.executor, partial(func, *args))
+        if self._semaphore is None or self._semaphore[0] is not loop:
+            self._semaphore = (loop, asyncio.Semaphore(self.max_concurrency))
+        async with self._semaphore[1]:
+            return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    async def feed_text_async(self, uctext, chunk_size=CHUNK_SIZE):
+        """feed_text in the executor, chunk_size characters at a time
+
+        when cancelled the chunks fed so far stay counted
+        """
+        for start in range(0, len(uctext), chunk_size):
+            await self._run_async(self.feed_text, uctext[start : start + chunk_size])
+
+    async def make_grid_async(
+        self,
+        grading,
+        outside_of_grading=False,
+        stats=False,
+        bar_graph=False,
+        max_pixels=None,
+    ):
+        """make_grid in the executor, a cancelled render finishes in the background"""
+        return await self._run_async(
+            self.make_grid, grading, outside_of_grading, stats, bar_graph, max_pixels
+        )
+
+    async def encode_async(self, grid, format="PNG", **params):
+        """return grid encoded as bytes, params are passed to Image.save"""
+
+        def encode():
+            buffer = BytesIO()
+            grid.save(buffer, format, **params)
+            return buffer.getvalue()
+
+        return await self._run_async(encode)
+
+    async def save_async(self, grid, fp, format=None, **params):
+        await self._run_async(partial(grid.save, fp, format, **params))
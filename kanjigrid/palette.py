@@ -0,0 +1,56 @@
+from PIL import ImageColor
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def rgb(color):
+    """color as an (r, g, b) tuple, resolved once instead of on every paste"""
+    if isinstance(color, tuple):
+        return color[:3]
+    return ImageColor.getrgb(color)[:3]
+
+
+class Palette:
+    """Colors of a palette mode grid
+
+    besides the plain colors it holds shades between a background and a
+    font color, which stand in for the anti-aliased edges of glyphs
+    """
+
+    def __init__(self, shades=16):
+        self.shades = shades
+        self.colors = []
+        self._indices = dict()
+        self._ramps = dict()
+
+    def __len__(self):
+        return len(self.colors)
+
+    def index(self, color):
+        color = rgb(color)
+        if color not in self._indices:
+            if len(self.colors) == 256:
+                raise ValueError("A palette can't hold more than 256 colors, use fewer shades")
+            self._indices[color] = len(self.colors)
+            self.colors.append(color)
+        return self._indices[color]
+
+    def ramp(self, bg, fg):
+        """256 entry lookup table from glyph alpha to the palette index of its shade"""
+        key = (rgb(bg), rgb(fg))
+        if key not in self._ramps:
+            bg, fg = key
+            steps = []
+            for level in range(self.shades):
+                t = level / (self.shades - 1)
+                steps.append(
+                    self.index(tuple(round(b + (f - b) * t) for b, f in zip(bg, fg)))
+                )
+            self._ramps[key] = [steps[round(a * (self.shades - 1) / 255)] for a in range(256)]
+        return self._ramps[key]
+
+    @property
+    def data(self):
+        """flat list of 768 values as expected by Image.putpalette"""
+        flat = [c for color in self.colors for c in color]
+        return flat + [0] * (768 - len(flat))
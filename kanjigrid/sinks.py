@@ -0,0 +1,374 @@
+from PIL import Image, ImageChops
+from io import BytesIO
+from math import ceil, log2
+import os
+import struct
+import zlib
+
+_PNG_COLOR_TYPES = {"L": 0, "RGB": 2, "P": 3}
+
+
+def _png_chunk(fp, tag, data):
+    fp.write(struct.pack(">I", len(data)))
+    fp.write(tag)
+    fp.write(data)
+    fp.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag))))
+
+
+def _png_rows(img):
+    # the raw scanlines of img, each starting with its filter type, 0 is none
+    raw = img.tobytes()
+    stride = len(raw) // img.height
+    rows = bytearray()
+    for y in range(img.height):
+        rows += b"\x00"
+        rows += raw[y * stride : (y + 1) * stride]
+    return bytes(rows)
+
+
+def _open_binary(fp):
+    if isinstance(fp, (str, os.PathLike)):
+        return open(fp, "wb")
+    return fp
+
+
+def _comparable(frame):
+    # palette images are compared by index, ImageChops would go by color
+    if frame.mode == "P":
+        return Image.frombytes("L", frame.size, frame.tobytes())
+    return frame.copy()
+
+
+def _changed_box(previous, frame):
+    # the box of frame that differs from previous, at least one pixel
+    box = ImageChops.difference(previous, _comparable(frame)).getbbox()
+    return box or (0, 0, 1, 1)
+
+
+class PNGBandWriter:
+    """Writes the bands of Gridder.make_grid_tiled into one PNG
+
+    the rows are compressed as they arrive, so the full image never exists
+    in memory. fp is a path or a binary file object.
+    """
+
+    def __init__(self, fp, compress_level=6):
+        self.fp = fp
+        self.compress_level = compress_level
+        self._file = None
+
+    def open(self, width, height, mode="RGB"):
+        if mode not in _PNG_COLOR_TYPES:
+            raise ValueError(f"Can't write {mode} images as PNG bands")
+        self._file = _open_binary(self.fp)
+        self._mode = mode
+        self._rows_left = height
+        self._file.write(b"\x89PNG\r\n\x1a\n")
+        ihdr = struct.pack(">IIBBBBB", width, height, 8, _PNG_COLOR_TYPES[mode], 0, 0, 0)
+        _png_chunk(self._file, b"IHDR", ihdr)
+        self._compressor = zlib.compressobj(self.compress_level)
+        self._palette_written = False
+
+    def write(self, band):
+        if band.mode != self._mode:
+            raise ValueError(f"Expected a {self._mode} band, got {band.mode}")
+        if band.mode == "P" and not self._palette_written:
+            # the palette has to come before the first IDAT chunk
+            _png_chunk(self._file, b"PLTE", bytes(band.getpalette()[:768]))
+            self._palette_written = True
+        self._rows_left -= band.height
+        data = self._compressor.compress(_png_rows(band))
+        if data:
+            _png_chunk(self._file, b"IDAT", data)
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            # a render that failed halfway leaves a PNG without an end
+            if self._rows_left == 0:
+                _png_chunk(self._file, b"IDAT", self._compressor.flush())
+                _png_chunk(self._file, b"IEND", b"")
+        finally:
+            if self._file is not self.fp:
+                self._file.close()
+            self._file = None
+
+
+class TilePyramidWriter:
+    """Writes the bands of Gridder.make_grid_tiled as a Deep Zoom tile pyramid
+
+    creates directory/name.dzi and directory/name_files/<level>/<col>_<row>.<format>,
+    which zoomable viewers like OpenSeadragon can open. Only one row of tiles
+    is buffered while rendering, the smaller levels are built from the saved
+    tiles on close.
+    """
+
+    def __init__(self, directory, name="grid", tile_size=256, format="png"):
+        self.directory = directory
+        self.name = name
+        self.tile_size = tile_size
+        self.format = format
+
+    def _tile_path(self, level, col, row):
+        return os.path.join(
+            self.directory,
+            f"{self.name}_files",
+            str(level),
+            f"{col}_{row}.{self.format}",
+        )
+
+    def _level_size(self, level):
+        scale = 2 ** (self.max_level - level)
+        return ceil(self.width / scale), ceil(self.height / scale)
+
+    def open(self, width, height, mode="RGB"):
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.max_level = ceil(log2(max(width, height, 1)))
+        for level in range(self.max_level + 1):
+            os.makedirs(os.path.dirname(self._tile_path(level, 0, 0)), exist_ok=True)
+        self._buffer = Image.new(mode, (width, self.tile_size))
+        self._filled = 0
+        self._row = 0
+
+    def _flush_row(self):
+        for col in range(ceil(self.width / self.tile_size)):
+            left = col * self.tile_size
+            tile = self._buffer.crop(
+                (left, 0, min(left + self.tile_size, self.width), self._filled)
+            )
+            tile.save(self._tile_path(self.max_level, col, self._row))
+        self._row += 1
+        self._filled = 0
+
+    def write(self, band):
+        top = 0
+        if band.mode == "P":
+            self._buffer.putpalette(band.getpalette())
+        while top < band.height:
+            take = min(self.tile_size - self._filled, band.height - top)
+            self._buffer.paste(
+                band.crop((0, top, band.width, top + take)), (0, self._filled)
+            )
+            self._filled += take
+            top += take
+            if self._filled == self.tile_size:
+                self._flush_row()
+
+    def _build_level(self, level):
+        width, height = self._level_size(level)
+        child_width, child_height = self._level_size(level + 1)
+        for row in range(ceil(height / self.tile_size)):
+            for col in range(ceil(width / self.tile_size)):
+                left, top = 2 * col * self.tile_size, 2 * row * self.tile_size
+                size = (
+                    min(2 * self.tile_size, child_width - left),
+                    min(2 * self.tile_size, child_height - top),
+                )
+                # palette images can't be resized smoothly
+                merged = Image.new("RGB" if self.mode == "P" else self.mode, size)
+                for dx in (0, 1):
+                    for dy in (0, 1):
+                        path = self._tile_path(level + 1, 2 * col + dx, 2 * row + dy)
+                        if os.path.exists(path):
+                            with Image.open(path) as child:
+                                merged.paste(
+                                    child, (dx * self.tile_size, dy * self.tile_size)
+                                )
+                half = (ceil(size[0] / 2), ceil(size[1] / 2))
+                merged.resize(half, Image.LANCZOS).save(
+                    self._tile_path(level, col, row)
+                )
+
+    def close(self):
+        if self._filled:
+            self._flush_row()
+        self._buffer = None
+        for level in range(self.max_level - 1, -1, -1):
+            self._build_level(level)
+        with open(os.path.join(self.directory, f"{self.name}.dzi"), "w") as f:
+            f.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+                f'TileSize="{self.tile_size}" Overlap="0" Format="{self.format}">'
+                f'<Size Width="{self.width}" Height="{self.height}"/></Image>\n'
+            )
+
+
+class APNGWriter:
+    """Writes the frames of Gridder.make_animation into an animated PNG as they come
+
+    only the box that changed since the previous frame is stored and no frame
+    but the previous one is kept. fp is a path or a binary file object, one
+    that can't seek needs the number of frames up front. delay is in ms,
+    loops 0 repeats forever.
+    """
+
+    def __init__(self, fp, delay=500, loops=0, frames=None, compress_level=6):
+        self.fp = fp
+        self.delay = delay
+        self.loops = loops
+        self.frames = frames
+        self.compress_level = compress_level
+        self._file = None
+
+    def _actl(self, frames):
+        _png_chunk(self._file, b"acTL", struct.pack(">II", frames, self.loops))
+
+    def open(self, width, height, mode="RGB"):
+        if mode not in _PNG_COLOR_TYPES:
+            raise ValueError(f"Can't write {mode} images as PNG frames")
+        self._file = _open_binary(self.fp)
+        self._mode = mode
+        self._size = (width, height)
+        self._file.write(b"\x89PNG\r\n\x1a\n")
+        ihdr = struct.pack(">IIBBBBB", width, height, 8, _PNG_COLOR_TYPES[mode], 0, 0, 0)
+        _png_chunk(self._file, b"IHDR", ihdr)
+        # the frame count is patched in on close when possible
+        self._actl_pos = self._file.tell() if self._file.seekable() else None
+        if self._actl_pos is None and self.frames is None:
+            raise ValueError("APNGWriter needs frames for files that can't seek")
+        self._actl(self.frames or 0)
+        self._sequence = 0
+        self._written = 0
+        self._previous = None
+
+    def _fctl(self, box):
+        left, top, right, bottom = box
+        fctl = struct.pack(
+            ">IIIIIHHBB",
+            self._sequence,
+            right - left,
+            bottom - top,
+            left,
+            top,
+            self.delay,
+            1000,
+            0,
+            0,
+        )
+        _png_chunk(self._file, b"fcTL", fctl)
+        self._sequence += 1
+
+    def write(self, frame):
+        if frame.mode != self._mode or frame.size != self._size:
+            raise ValueError(
+                f"Expected a {self._mode} frame of {self._size}, "
+                f"got {frame.mode} {frame.size}"
+            )
+        if self._previous is None:
+            if frame.mode == "P":
+                _png_chunk(self._file, b"PLTE", bytes(frame.getpalette()[:768]))
+            self._fctl((0, 0, frame.width, frame.height))
+            data = zlib.compress(_png_rows(frame), self.compress_level)
+            _png_chunk(self._file, b"IDAT", data)
+        else:
+            box = _changed_box(self._previous, frame)
+            self._fctl(box)
+            data = zlib.compress(_png_rows(frame.crop(box)), self.compress_level)
+            _png_chunk(self._file, b"fdAT", struct.pack(">I", self._sequence) + data)
+            self._sequence += 1
+        self._previous = _comparable(frame)
+        self._written += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            if self._written:
+                if self._actl_pos is not None:
+                    end = self._file.tell()
+                    self._file.seek(self._actl_pos)
+                    self._actl(self._written)
+                    self._file.seek(end)
+                _png_chunk(self._file, b"IEND", b"")
+        finally:
+            if self._file is not self.fp:
+                self._file.close()
+            self._file = None
+            self._previous = None
+
+
+def _gif_image(data, left, top):
+    # the image block of a one frame GIF written by Pillow, moved to (left, top)
+    # and with the global color table turned into a local one
+    flags = data[10]
+    pos = 13
+    table = b""
+    if flags & 0x80:
+        table = data[pos : pos + (3 << ((flags & 7) + 1))]
+        pos += len(table)
+    while data[pos] == 0x21:
+        # skips extensions, a label and then sub-blocks until an empty one
+        pos += 2
+        while data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    _, _, width, height, image_flags = struct.unpack("<HHHHB", data[pos + 1 : pos + 10])
+    pos += 10
+    if image_flags & 0x80:
+        # the local table follows the descriptor and comes along with the data
+        table = b""
+    else:
+        image_flags = (image_flags & 0x40) | 0x80 | (flags & 7)
+    # everything up to the trailer is the local table if any and the image data
+    header = b"," + struct.pack("<HHHHB", left, top, width, height, image_flags)
+    return header + table + data[pos:-1]
+
+
+class GIFWriter:
+    """Writes the frames of Gridder.make_animation into an animated GIF as they come
+
+    every frame is encoded by Pillow on its own, only the box that changed
+    since the previous one, and gets its own color table. RGB frames are
+    quantized to 256 colors, Gridder(mode="P") frames are stored as they
+    are. delay is in ms, loops 0 repeats forever.
+    """
+
+    def __init__(self, fp, delay=500, loops=0):
+        self.fp = fp
+        self.delay = delay
+        self.loops = loops
+        self._file = None
+
+    def open(self, width, height, mode="RGB"):
+        self._file = _open_binary(self.fp)
+        self._size = (width, height)
+        # no global color table, the frames bring their own
+        self._file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0))
+        self._file.write(
+            b"!\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loops) + b"\x00"
+        )
+        self._previous = None
+
+    def write(self, frame):
+        if frame.size != self._size:
+            raise ValueError(f"Expected a frame of {self._size}, got {frame.size}")
+        if self._previous is None:
+            box = (0, 0, frame.width, frame.height)
+        else:
+            box = _changed_box(self._previous, frame)
+        part = frame.crop(box)
+        if part.mode != "P":
+            part = part.convert("RGB").quantize(256)
+        buffer = BytesIO()
+        part.save(buffer, "GIF")
+        # graphic control extension: keep the frame (disposal 1), delay in 1/100 s
+        self._file.write(
+            b"!\xf9\x04" + struct.pack("<BHBB", 1 << 2, round(self.delay / 10), 0, 0)
+        )
+        self._file.write(_gif_image(buffer.getvalue(), box[0], box[1]))
+        self._previous = _comparable(frame)
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            self._file.write(b";")
+        finally:
+            if self._file is not self.fp:
+                self._file.close()
+            self._file = None
+            self._previous = None
@@ -0,0 +1,138 @@
+from html import escape
+from .palette import rgb
+
+
+def _css(color):
+    # colors may be names, "#rgb" strings or tuples, css wants one form
+    return "#%02x%02x%02x" % rgb(color)
+
+
+def _color_classes(gridder):
+    # every color a cell can get -> css class name
+    colors = [gridder.kanji_background_color] + list(gridder.colordict.values())
+    return {color: f"c{i}" for i, color in enumerate(dict.fromkeys(colors))}
+
+
+def _font_family(font):
+    return escape(font.font.family, quote=True)
+
+
+def iter_svg(gridder, layout):
+    """yield the grid of layout as SVG markup, section by section
+
+    cells are a colored rect and a text element each, so the glyphs are drawn
+    by the viewer's copy of the font instead of being rasterized
+    """
+    ksize = gridder.kfont.size
+    hsize = gridder.hfont.size
+    kascent = gridder.kfont.getmetrics()[0]
+    hascent = gridder.hfont.getmetrics()[0]
+    koffset = gridder._glyph_offset(gridder.kfont.font.family)
+    hoffset = gridder._glyph_offset(gridder.hfont.font.family)
+    classes = _color_classes(gridder)
+    yield (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout.width}" '
+        f'height="{layout.height}" viewBox="0 0 {layout.width} {layout.height}">\n'
+        "<style>"
+        f".k{{font-family:'{_font_family(gridder.kfont)}';font-size:{ksize}px;"
+        f"fill:{_css(gridder.kanji_font_color)}}}"
+        f".h{{font-family:'{_font_family(gridder.hfont)}';font-size:{hsize}px;"
+        f"fill:{_css(gridder.header_font_color)}}}"
+        + "".join(f".{name}{{fill:{_css(color)}}}" for color, name in classes.items())
+        + "</style>\n"
+        f'<rect width="100%" height="100%" fill="{_css(gridder.background_color)}"/>\n'
+    )
+    for section in layout.sections:
+        if section.kind == "header":
+            y = section.y + gridder.padding_above_header + hoffset + hascent
+            yield f'<text class="h" x="{section.x}" y="{y:g}">{escape(section.data)}</text>\n'
+        elif section.kind == "text":
+            y = section.y + hascent
+            yield (
+                f'<text class="h" x="{section.x + hsize}" y="{y}">'
+                f"{escape(section.data)}</text>\n"
+            )
+        elif section.kind == "bar":
+            top = section.y + gridder.bar_padding
+            yield (
+                f'<rect x="{section.x}" y="{top}" width="{section.width}" '
+                f'height="{2 * gridder.bar_hori_border + ksize}" '
+                f'fill="{_css(gridder.header_font_color)}"/>\n'
+            )
+            x = section.x + gridder.bar_vert_border
+            top += gridder.bar_hori_border
+            for part_width, color in section.data:
+                yield (
+                    f'<rect x="{x}" y="{top}" width="{part_width}" '
+                    f'height="{ksize}" fill="{_css(color)}"/>\n'
+                )
+                x += part_width
+        elif section.kind == "subgrid":
+            # one chunk per row of cells
+            for start in range(0, len(section.data), gridder.columns):
+                row = []
+                y = section.y + start // gridder.columns * ksize
+                for k, kanji in enumerate(section.data[start : start + gridder.columns]):
+                    x = section.x + k * ksize
+                    color = gridder._kanji_color(gridder.kcounter.get(kanji, 0))
+                    row.append(
+                        f'<rect class="{classes[color]}" x="{x}" y="{y}" '
+                        f'width="{ksize}" height="{ksize}"/>'
+                        f'<text class="k" x="{x}" y="{y + koffset + kascent:g}">'
+                        f"{kanji}</text>"
+                    )
+                yield "".join(row) + "\n"
+    yield "</svg>\n"
+
+
+def iter_html(gridder, layout):
+    """yield the grid of layout as an HTML page, section by section
+
+    the subgrids become css grids of gridder.columns columns and the bar graph
+    a row of boxes sized in percent, so the page scales with the window
+    """
+    ksize = gridder.kfont.size
+    classes = _color_classes(gridder)
+    yield (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<style>\n'
+        f"body{{background:{_css(gridder.background_color)};"
+        f"color:{_css(gridder.header_font_color)};"
+        f"font-family:'{_font_family(gridder.hfont)}';"
+        f"font-size:{gridder.hfont.size}px;"
+        f"max-width:{layout.width - 2 * ksize}px;margin:0 auto;padding:0 {ksize}px}}\n"
+        f"h2{{font-size:inherit;font-weight:normal;margin:"
+        f"{gridder.padding_above_header}px 0 {gridder.padding_under_header}px}}\n"
+        f".grid{{display:grid;grid-template-columns:repeat({gridder.columns},1fr);"
+        f"font-family:'{_font_family(gridder.kfont)}';"
+        f"font-size:{ksize}px;line-height:1;color:{_css(gridder.kanji_font_color)}}}\n"
+        f".bar{{display:flex;height:{ksize}px;margin-top:{gridder.bar_padding}px;"
+        f"border:solid {_css(gridder.header_font_color)};"
+        f"border-width:{gridder.bar_hori_border}px {gridder.bar_vert_border}px}}\n"
+        "p{margin:0;padding-left:1em}\n"
+        + "".join(
+            f".{name}{{background:{_css(color)}}}\n" for color, name in classes.items()
+        )
+        + "</style>\n</head>\n<body>\n"
+    )
+    for section in layout.sections:
+        if section.kind == "header":
+            yield f"<h2>{escape(section.data)}</h2>\n"
+        elif section.kind == "text":
+            yield f"<p>{escape(section.data)}</p>\n"
+        elif section.kind == "bar":
+            bar_width = sum(part_width for part_width, _ in section.data) or 1
+            yield '<div class="bar">' + "".join(
+                f'<div style="width:{100 * part_width / bar_width:.3f}%;'
+                f'background:{_css(color)}"></div>'
+                for part_width, color in section.data
+            ) + "</div>\n"
+        elif section.kind == "subgrid":
+            yield '<div class="grid">\n'
+            for start in range(0, len(section.data), gridder.columns):
+                row = []
+                for kanji in section.data[start : start + gridder.columns]:
+                    color = gridder._kanji_color(gridder.kcounter.get(kanji, 0))
+                    row.append(f'<span class="{classes[color]}">{kanji}</span>')
+                yield "".join(row) + "\n"
+            yield "</div>\n"
+    yield "</body>\n</html>\n"
@@ -0,0 +1,18 @@
+import os
+
+import pytest
+
+from kanjigrid.fonts import FONT_ALIASES, find_font
+
+
+@pytest.fixture(scope="session")
+def font():
+    """a TrueType font for Gridders, KANJIGRID_TEST_FONT or an installed kanji font"""
+    path = os.environ.get("KANJIGRID_TEST_FONT")
+    if path:
+        return path
+    for name in FONT_ALIASES["Kanji"]:
+        path = find_font(name)
+        if path is not None:
+            return path
+    pytest.skip("no font found, set KANJIGRID_TEST_FONT")
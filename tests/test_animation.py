@@ -0,0 +1,107 @@
+import io
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageSequence
+
+import kanjigrid
+
+TEXT = (Path(__file__).parents[1] / "test.txt").read_text(encoding="utf-8")
+CHAPTERS = [TEXT[i * len(TEXT) // 4 : (i + 1) * len(TEXT) // 4] for i in range(4)]
+
+
+class Unseekable(io.RawIOBase):
+    """write-only stream that can't seek, like a pipe"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+def gridder(font, mode):
+    return kanjigrid.Gridder(font, 24, font, 30, mode=mode)
+
+
+def expected_frames(font, mode):
+    # a fresh make_grid after every chapter
+    reference = gridder(font, mode)
+    frames = []
+    for chapter in CHAPTERS:
+        reference.feed_text(chapter)
+        frames.append(reference.make_grid(kanjigrid.JLPT(), False, True, True))
+    return [frame.convert("RGB") for frame in frames]
+
+
+def read_frames(data):
+    with Image.open(io.BytesIO(data)) as img:
+        return [frame.convert("RGB") for frame in ImageSequence.Iterator(img)]
+
+
+def assert_frames_equal(frames, expected):
+    assert len(frames) == len(expected)
+    for number, (frame, wanted) in enumerate(zip(frames, expected)):
+        assert frame.size == wanted.size
+        assert frame.tobytes() == wanted.tobytes(), f"frame {number} differs"
+
+
+@pytest.mark.parametrize("mode", ["RGB", "P"])
+def test_apng_frames(font, mode):
+    buffer = io.BytesIO()
+    sink = kanjigrid.APNGWriter(buffer, delay=250)
+    gridder(font, mode).make_animation(CHAPTERS, kanjigrid.JLPT(), sink, stats=True)
+    with Image.open(io.BytesIO(buffer.getvalue())) as img:
+        assert img.n_frames == len(CHAPTERS)
+        assert img.info["loop"] == 0
+        assert img.info["duration"] == 250
+    assert_frames_equal(read_frames(buffer.getvalue()), expected_frames(font, mode))
+
+
+def test_apng_unseekable_needs_frames(font):
+    with pytest.raises(ValueError):
+        kanjigrid.APNGWriter(Unseekable()).open(10, 10)
+    stream = Unseekable()
+    sink = kanjigrid.APNGWriter(stream, frames=len(CHAPTERS))
+    gridder(font, "P").make_animation(CHAPTERS, kanjigrid.JLPT(), sink, stats=True)
+    data = stream.buffer.getvalue()
+    assert_frames_equal(read_frames(data), expected_frames(font, "P"))
+
+
+def test_gif_frames(font):
+    # palette mode frames fit into a GIF without quantizing
+    buffer = io.BytesIO()
+    sink = kanjigrid.GIFWriter(buffer, delay=250, loops=3)
+    gridder(font, "P").make_animation(CHAPTERS, kanjigrid.JLPT(), sink, stats=True)
+    with Image.open(io.BytesIO(buffer.getvalue())) as img:
+        assert img.n_frames == len(CHAPTERS)
+        assert img.info["loop"] == 3
+        assert img.info["duration"] == 250
+    assert_frames_equal(read_frames(buffer.getvalue()), expected_frames(font, "P"))
+
+
+def test_frames_from_snapshots(font, tmp_path):
+    paths = []
+    for number, chapter in enumerate(CHAPTERS):
+        counts = gridder(font, "P")
+        counts.feed_text(chapter)
+        paths.append(tmp_path / f"{number}.kgc")
+        counts.save_counts(paths[-1])
+    buffer = io.BytesIO()
+    sink = kanjigrid.APNGWriter(buffer)
+    gridder(font, "P").make_animation(paths, kanjigrid.JLPT(), sink, stats=True)
+    assert_frames_equal(read_frames(buffer.getvalue()), expected_frames(font, "P"))
+
+
+def test_frame_size_mismatch(font):
+    sink = kanjigrid.APNGWriter(io.BytesIO())
+    sink.open(10, 10, "RGB")
+    with pytest.raises(ValueError):
+        sink.write(Image.new("RGB", (11, 10)))
+    sink.close()
@@ -0,0 +1,35 @@
+import hashlib
+from collections import Counter
+from pathlib import Path
+
+import kanjigrid
+from kanjigrid.cache import _hash_counts
+from kanjigrid.counter import KanjiCounter
+
+TEXT = (Path(__file__).parents[1] / "test.txt").read_text(encoding="utf-8")
+
+
+def counts_digest(kcounter):
+    digest = hashlib.sha256()
+    _hash_counts(digest, kcounter)
+    return digest.hexdigest()
+
+
+def test_counter_types_hash_the_same():
+    counts = {"日": 3, "本": 1, "々": 2}
+    assert counts_digest(Counter(counts)) == counts_digest(KanjiCounter(counts))
+    assert counts_digest(Counter(counts)) != counts_digest(Counter({"日": 3}))
+
+
+def test_other_files_are_left_alone(font, tmp_path):
+    other = tmp_path / "thesis.pdf"
+    other.write_bytes(b"%PDF" * 1000)
+    cache = kanjigrid.GridCache(tmp_path, max_bytes=1)
+    assert cache._size == 0
+    gridder = kanjigrid.Gridder(font, 24, font, 30)
+    gridder.feed_text(TEXT)
+    cache.get_grid(gridder, kanjigrid.Jouyou())
+    cache.get_grid(gridder, kanjigrid.Jouyou(), stats=True)
+    assert other.exists()
+    cache.clear()
+    assert [p.name for p in tmp_path.iterdir()] == ["thesis.pdf"]
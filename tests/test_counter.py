@@ -0,0 +1,147 @@
+import io
+from collections import Counter
+
+import pytest
+
+import kanjigrid
+from kanjigrid import counter
+from kanjigrid.counter import (
+    KANJI_SLOTS,
+    KanjiCounter,
+    load_counts,
+    merge_counts,
+    save_counts,
+)
+
+TEXTS = ["日本語の漢字々〆", "日日日本人", "龯一一〆"]
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        # get_numpy returns None once _np is None, as if numpy wasn't installed
+        monkeypatch.setattr(counter, "_np", None)
+    return request.param
+
+
+def counted(text):
+    return Counter(k for k in text if k in counter.KANJI_SET)
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_round_trip_path(backend, tmp_path, use_mmap):
+    path = tmp_path / "counts.kgc"
+    save_counts(KanjiCounter(TEXTS[0]), path)
+    assert path.stat().st_size == 16 + 8 * KANJI_SLOTS
+    loaded = load_counts(path, use_mmap=use_mmap)
+    assert dict(loaded) == counted(TEXTS[0])
+    if backend == "array":
+        assert type(loaded._counts).__name__ == "array"
+    elif use_mmap:
+        assert type(loaded._counts).__name__ == "memmap"
+
+
+def test_mmap_updates_stay_in_memory(backend, tmp_path):
+    path = tmp_path / "counts.kgc"
+    save_counts(KanjiCounter(TEXTS[0]), path)
+    loaded = load_counts(path)
+    loaded.update("日日")
+    assert loaded["日"] == counted(TEXTS[0])["日"] + 2
+    assert load_counts(path)["日"] == counted(TEXTS[0])["日"]
+
+
+def test_round_trip_file_object(backend):
+    buffer = io.BytesIO()
+    save_counts(counted(TEXTS[1]), buffer)
+    buffer.seek(0)
+    assert dict(load_counts(buffer)) == counted(TEXTS[1])
+
+
+def test_numpy_and_array_files_are_the_same(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    save_counts(KanjiCounter(TEXTS[0]), tmp_path / "numpy.kgc")
+    monkeypatch.setattr(counter, "_np", None)
+    save_counts(KanjiCounter(TEXTS[0]), tmp_path / "array.kgc")
+    numpy_bytes = (tmp_path / "numpy.kgc").read_bytes()
+    assert numpy_bytes == (tmp_path / "array.kgc").read_bytes()
+
+
+def test_merge_equals_summed_counters(backend, tmp_path):
+    paths = []
+    for i, text in enumerate(TEXTS):
+        paths.append(tmp_path / f"{i}.kgc")
+        save_counts(KanjiCounter(text), paths[-1])
+    assert dict(merge_counts(paths)) == sum(map(counted, TEXTS), Counter())
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"KGCOUNTS",
+        b"NOTCOUNT" + bytes(8 + 8 * KANJI_SLOTS),
+        # version 2
+        b"KGCOUNTS\x02\x00\x00\x00" + KANJI_SLOTS.to_bytes(4, "little"),
+        # wrong number of slots
+        b"KGCOUNTS\x01\x00\x00\x00" + (KANJI_SLOTS - 1).to_bytes(4, "little"),
+        # header without counts
+        b"KGCOUNTS\x01\x00\x00\x00" + KANJI_SLOTS.to_bytes(4, "little"),
+    ],
+)
+def test_bad_snapshot_is_rejected(backend, tmp_path, data):
+    path = tmp_path / "bad.kgc"
+    path.write_bytes(data)
+    for use_mmap in (True, False):
+        with pytest.raises(ValueError):
+            load_counts(path, use_mmap=use_mmap)
+    with pytest.raises(ValueError):
+        load_counts(io.BytesIO(data))
+
+
+def test_save_rejects_non_kanji(backend):
+    with pytest.raises(ValueError):
+        save_counts(Counter("日a"), io.BytesIO())
+
+
+def test_numpy_counts_across_slices(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(counter, "SLICE_SIZE", 3)
+    text = "".join(TEXTS) + "abc"
+    for cls in (Counter, KanjiCounter):
+        found = cls()
+        counter.count_kanji(text, found, "numpy")
+        assert dict(found) == counted(text)
+
+
+@pytest.mark.parametrize(
+    "extractor, kanji_set",
+    [("bogus", counter.KANJI_SET), ("regex", {"日"}), ("numpy", {"日"})],
+)
+def test_count_rejects_unusable_extractor(extractor, kanji_set):
+    if extractor == "numpy":
+        pytest.importorskip("numpy")
+    with pytest.raises(ValueError):
+        counter.count_kanji(TEXTS[0], Counter(), extractor, kanji_set)
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_save_over_loaded_snapshot(backend, tmp_path, use_mmap):
+    path = tmp_path / "counts.kgc"
+    save_counts(KanjiCounter(TEXTS[0]), path)
+    loaded = load_counts(path, use_mmap=use_mmap)
+    save_counts(KanjiCounter(TEXTS[1]), path)
+    assert dict(loaded) == counted(TEXTS[0])
+    assert dict(load_counts(path)) == counted(TEXTS[1])
+    assert [p.name for p in tmp_path.iterdir()] == ["counts.kgc"]
+
+
+def test_gridder_copies_loaded_snapshot(font, tmp_path):
+    path = tmp_path / "counts.kgc"
+    save_counts(KanjiCounter(TEXTS[0]), path)
+    gridder = kanjigrid.Gridder(font, 24, font, 30)
+    gridder.load_counts(path)
+    with open(path, "r+b") as f:
+        f.truncate(0)
+    assert dict(gridder.kcounter) == counted(TEXTS[0])
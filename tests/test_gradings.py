@@ -0,0 +1,47 @@
+import pytest
+
+from kanjigrid import FileGrading
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize(
+    "name, text",
+    [
+        ("levels.txt", "# comment\nA: 一二\nB: 三 四\nA: 五\n"),
+        ("levels.json", '{"A": "一二五", "B": ["三", "四"]}'),
+        ("levels.csv", "level,kanji\nA,一二\nB,三四\nA,五\n"),
+    ],
+)
+def test_formats(tmp_path, name, text):
+    grading = FileGrading(write(tmp_path, name, text), cache_dir=tmp_path / "cache")
+    assert [level["Name"] for level in grading.gradings.values()] == ["A", "B"]
+    assert grading.gradings[1]["Kanji"] == frozenset("一二五")
+    assert dict(grading.level_counts()) == {1: 3, 2: 2}
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("A: 一二\nB: 二三\n", "line 2"),
+        ("A: 一x\n", "line 1"),
+        ("A 一二\n", "line 1"),
+    ],
+)
+def test_invalid_files(tmp_path, text, message):
+    with pytest.raises(ValueError, match=message):
+        FileGrading(write(tmp_path, "bad.txt", text), cache_dir=tmp_path / "cache")
+
+
+def test_compiled_cache_follows_the_file(tmp_path):
+    path = write(tmp_path, "levels.txt", "A: 一二\n")
+    grading = FileGrading(path, cache_dir=tmp_path / "cache")
+    assert grading.gradings[1]["Kanji"] == frozenset("一二")
+    assert list((tmp_path / "cache").iterdir())
+    path.write_text("A: 一二三\n", encoding="utf-8")
+    grading = FileGrading(path, cache_dir=tmp_path / "cache")
+    assert grading.gradings[1]["Kanji"] == frozenset("一二三")
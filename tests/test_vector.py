@@ -0,0 +1,29 @@
+import re
+from pathlib import Path
+
+import pytest
+
+import kanjigrid
+
+TEXT = (Path(__file__).parents[1] / "test.txt").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("make", ["make_svg", "make_html"])
+def test_colors_are_written_as_hex(font, make):
+    gridder = kanjigrid.Gridder(
+        font,
+        24,
+        font,
+        30,
+        colordict={1: (255, 0, 0), 5: "green", 10: "#00f"},
+        background_color=(1, 2, 3),
+    )
+    gridder.feed_text(TEXT)
+    markup = "".join(
+        getattr(gridder, make)(kanjigrid.Jouyou(), stats=True, bar_graph=True)
+    )
+    colors = re.findall(r"(?:fill|background|color|solid)[:=]\"?([^;}\"]*)", markup)
+    assert colors
+    assert all(re.fullmatch("#[0-9a-f]{6}", color) for color in colors)
+    for color in ("#ff0000", "#008000", "#0000ff", "#010203"):
+        assert color in colors